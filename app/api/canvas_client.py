@@ -1,36 +1,291 @@
 # app/api/canvas_client.py
 
+import re
 import requests
-import json
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.adapters import HTTPAdapter
 from canvasapi import Canvas
-from canvasapi.exceptions import InvalidAccessToken, Unauthorized
+from app.api import json_codec
+from app.api.records import CourseRecord, RubricRecord, QuizRecord, AssignmentRecord
 from app.utils.logger_config import logger
 
+JSON_HEADERS = {'Content-Type': 'application/json; charset=utf-8'}
+
+
+def _grade_matches(expected: str, submission: dict) -> bool:
+    """Comprueba si la nota registrada en una entrega coincide con la enviada."""
+    entered = submission.get('entered_grade') or submission.get('grade')
+    if entered is None:
+        return False
+    try:
+        return float(str(expected).rstrip('%')) == float(str(entered).rstrip('%'))
+    except ValueError:
+        return str(expected).strip().lower() == str(entered).strip().lower()
+
+
+def _error_body(error: Exception) -> str:
+    """Cuerpo de la respuesta de Canvas asociada a un error, o 'N/A' si no hay respuesta."""
+    response = getattr(error, 'response', None)
+    return response.text if response is not None else 'N/A'
+
+
+def _item_identity(item: dict) -> tuple:
+    """
+    Identidad de un ítem de Nuevo Quiz independiente de su posición: título y enunciado
+    normalizados. Sirve para reconocer los ítems del archivo que ya existen en el quiz.
+    """
+    entry = item.get('entry') or {}
+    return tuple(re.sub(r'\s+', ' ', str(entry.get(field) or '')).strip().casefold()
+                 for field in ('title', 'item_body'))
+
+
 class CanvasClient:
     """
     Gestiona toda la comunicación con la API de Canvas LMS.
     """
 
+    # Número máximo de peticiones simultáneas contra Canvas (compartido por todas las operaciones masivas)
+    MAX_CONCURRENT_REQUESTS = 6
+    # Reintentos ante respuestas de límite de peticiones (429 / 403 "Rate Limit Exceeded")
+    MAX_RETRIES = 3
+    # Ítems de Nuevos Quizzes que se envían en paralelo en cada lote
+    NEW_QUIZ_ITEM_BATCH_SIZE = 25
+    # Calificaciones enviadas en cada petición a 'update_grades'
+    GRADE_CHUNK_SIZE = 250
+    # Espera inicial y máxima (segundos) entre consultas de un objeto Progress, y tiempo límite
+    PROGRESS_POLL_INTERVAL = 1
+    PROGRESS_POLL_MAX_INTERVAL = 8
+    PROGRESS_TIMEOUT = 15 * 60
+    # Tiempo límite (segundos) de conexión y de lectura de cada petición: una conexión lenta
+    # o medio cerrada no debe bloquear indefinidamente un hilo (p. ej. el de la bandeja de salida)
+    REQUEST_TIMEOUT = (10, 60)
+
     # --------------------------------------------------------------------------
     # INICIALIZACIÓN Y CONEXIÓN
     # --------------------------------------------------------------------------
 
-    def __init__(self, canvas_url: str, api_token: str):
+    def __init__(self, canvas_url: str, api_token: str, validate: bool = True):
+        """
+        Con 'validate=False' no se comprueba el token al crear el cliente (no hay ninguna
+        petición); la comprobación se hace después con 'validate_token'.
+        """
         logger.info("Inicializando CanvasClient...")
+        self._local = threading.local()
         self.canvas = None
         self.error_message = None
+        self.user = None  # {'id', 'name'} del usuario tras una validación correcta
+        self.token_revoked = False
         self.canvas_url = canvas_url.rstrip('/')
         self.api_token = api_token
+        # Sesión HTTP compartida: reutiliza las conexiones entre peticiones.
+        self.session = requests.Session()
+        self.session.headers.update({
+            'Authorization': f'Bearer {self.api_token}',
+            'Accept': 'application/json'
+        })
+        adapter = HTTPAdapter(pool_connections=self.MAX_CONCURRENT_REQUESTS, pool_maxsize=self.MAX_CONCURRENT_REQUESTS)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self._request_slots = threading.BoundedSemaphore(self.MAX_CONCURRENT_REQUESTS)
+        # Índice local de contenido (app/core/content_index.py) para no crear duplicados; opcional.
+        self.content_index = None
+        # Función opcional que recibe el ID de un curso cuyo contenido acaba de cambiar
+        # (p. ej. para descartar sus listas precargadas)
+        self.on_course_changed = None
         try:
             self.canvas = Canvas(self.canvas_url, self.api_token)
-            user = self.canvas.get_current_user()
-            logger.info(f"Conexión exitosa como usuario: {user.name}")
-        except (InvalidAccessToken, Unauthorized):
-            self.error_message = "Error: Token de acceso inválido o sin autorización."
-            logger.error(self.error_message)
         except Exception as e:
             self.error_message = f"No se pudo conectar a Canvas. Verifique la URL.\nError: {e}"
             logger.error(self.error_message)
+            return
+        if validate:
+            self.validate_token()
+
+    @property
+    def error_message(self) -> str | None:
+        """
+        Último error del hilo actual. Cada hilo (trabajos, precarga, bandeja de salida) ve
+        solo sus propios errores, así que un fallo ajeno no se atribuye a otra operación.
+        """
+        return getattr(self._local, 'error_message', None)
+
+    @error_message.setter
+    def error_message(self, value: str | None):
+        self._local.error_message = value
+
+    @property
+    def linked_id(self):
+        """
+        ID del elemento existente con el que el hilo actual enlazó su última creación de
+        rúbrica o actividad en lugar de crearla (contenido idéntico), o None si se creó.
+        """
+        return getattr(self._local, 'linked_id', None)
+
+    @linked_id.setter
+    def linked_id(self, value):
+        self._local.linked_id = value
+
+    def validate_token(self) -> dict | None:
+        """
+        Comprueba las credenciales pidiendo el usuario actual. Devuelve {'id', 'name'}
+        o None; si Canvas rechaza el token se marca 'token_revoked'.
+        """
+        try:
+            response = self._send('GET', f"{self.canvas_url}/api/v1/users/self", timeout=15)
+            user = json_codec.loads(response.content)
+            self.user = {'id': user.get('id'), 'name': user.get('name')}
+            self.token_revoked = False
+            logger.info(f"Conexión exitosa como usuario: {self.user['name']}")
+            return self.user
+        except requests.exceptions.HTTPError as e:
+            if e.response is not None and e.response.status_code == 401:
+                self.token_revoked = True
+                self.error_message = "Error: Token de acceso inválido o sin autorización."
+            else:
+                self.error_message = f"No se pudo conectar a Canvas. Verifique la URL.\nError: {e}"
+        except (requests.exceptions.RequestException, ValueError) as e:  # ValueError: la respuesta no es JSON
+            self.error_message = f"No se pudo conectar a Canvas. Verifique la URL.\nError: {e}"
+        logger.error(self.error_message)
+        return None
+
+    def is_reachable(self, timeout: float = 5) -> bool:
+        """Comprueba rápidamente si el servidor de Canvas responde (cualquier código HTTP vale)."""
+        try:
+            self.session.head(self.canvas_url, timeout=timeout)
+            return True
+        except requests.exceptions.RequestException:
+            return False
+
+    def _paginate(self, path: str, params: dict | None = None):
+        """
+        Recorre una colección paginada de la API siguiendo las cabeceras 'Link'.
+        Devuelve los elementos uno a uno, de modo que solo hay una página en memoria.
+        Los errores HTTP se propagan al llamador.
+        """
+        url = f"{self.canvas_url}{path}"
+        params = {'per_page': 100, **(params or {})}
+        while url:
+            response = self._send('GET', url, params=params)
+            yield from json_codec.loads(response.content)
+            url = response.links.get('next', {}).get('url')
+            params = None  # La URL 'next' ya incluye los parámetros de la consulta
+
+    def _send(self, method: str, url: str, **kwargs):
+        """
+        Envía una petición respetando el límite de concurrencia del cliente y reintenta
+        con espera creciente cuando Canvas indica que se ha superado el límite de peticiones.
+        Un cuerpo pasado como 'json' se codifica una sola vez y se reutiliza en los reintentos.
+        Si no se indica 'timeout' se aplica REQUEST_TIMEOUT.
+        """
+        kwargs.setdefault('timeout', self.REQUEST_TIMEOUT)
+        if 'json' in kwargs:
+            kwargs['data'] = json_codec.dumps(kwargs.pop('json'))
+            kwargs['headers'] = {**JSON_HEADERS, **kwargs.get('headers', {})}
+        for attempt in range(self.MAX_RETRIES + 1):
+            with self._request_slots:
+                response = self.session.request(method, url, **kwargs)
+            rate_limited = response.status_code == 429 or (
+                response.status_code == 403 and 'Rate Limit Exceeded' in response.text)
+            if not rate_limited or attempt == self.MAX_RETRIES:
+                break
+            wait = 2 ** attempt
+            logger.warning(f"Límite de peticiones alcanzado en {url}. Reintentando en {wait}s...")
+            time.sleep(wait)
+        response.raise_for_status()
+        return response
+
+    def _run_concurrently(self, func, items: list, progress_callback=None) -> list:
+        """
+        Ejecuta 'func(item)' para cada elemento en paralelo, dentro del límite de
+        concurrencia del cliente. Devuelve una lista de (índice, resultado, error)
+        en el orden original; un fallo no detiene el resto. Si 'progress_callback' lanza
+        una excepción (p. ej. al cancelar un trabajo) se descartan los envíos pendientes.
+        """
+        results = [None] * len(items)
+        done = 0
+        pool = ThreadPoolExecutor(max_workers=self.MAX_CONCURRENT_REQUESTS)
+        try:
+            futures = {pool.submit(func, item): index for index, item in enumerate(items)}
+            for future in as_completed(futures):
+                index = futures[future]
+                try:
+                    results[index] = (index, future.result(), None)
+                except Exception as e:
+                    detail = e.response.text if isinstance(e, requests.exceptions.RequestException) and e.response is not None else ''
+                    results[index] = (index, None, f"{e} {detail}".strip())
+                done += 1
+                if progress_callback:
+                    progress_callback(done, len(items))
+        except BaseException:
+            pool.shutdown(wait=True, cancel_futures=True)
+            raise
+        pool.shutdown(wait=True)
+        return results
+
+    def _course_changed(self, course_id: int):
+        if self.on_course_changed:
+            self.on_course_changed(course_id)
+
+    def _indexed_item_exists(self, path: str) -> bool:
+        """
+        Comprueba con una sola petición que un elemento encontrado en el índice de contenido
+        sigue existiendo en Canvas (puede haberse borrado desde la web). Un 404 o un elemento
+        borrado devuelven False; el resto de errores se propagan.
+        """
+        try:
+            item = json_codec.loads(self._send('GET', f"{self.canvas_url}{path}").content)
+        except requests.exceptions.HTTPError as e:
+            if e.response is not None and e.response.status_code == 404:
+                return False
+            raise
+        return item.get('workflow_state') != 'deleted'
+
+    def _find_indexed(self, course_id: int, kind: str, existing_id, path: str) -> bool:
+        """
+        Confirma un acierto del índice de contenido. Si el elemento ya no está en Canvas se
+        olvida y devuelve False para que se vuelva a crear.
+        """
+        if self._indexed_item_exists(path):
+            return True
+        logger.info(f"El elemento {existing_id} ({kind}) del índice ya no existe en el curso {course_id}. Se creará de nuevo.")
+        self.content_index.discard(course_id, kind, existing_id)
+        return False
+
+    def _seed_content_index(self, course_id: int, kind: str, load_items) -> bool:
+        """
+        Rellena el índice de contenido del curso la primera vez (o cuando caduca). Si no
+        hay índice o no se puede leer el curso, se crea sin comprobar duplicados.
+        """
+        if not self.content_index:
+            return False
+        try:
+            self.content_index.ensure_seeded(course_id, kind, lambda: list(load_items()))
+            return True
+        except requests.exceptions.RequestException as e:
+            logger.warning(f"No se pudo leer el contenido del curso {course_id} para evitar duplicados: {e}")
+            return False
+
+    def _wait_for_progress(self, progress: dict, on_update=None) -> dict:
+        """
+        Consulta un objeto Progress de Canvas (trabajos asíncronos) con espera creciente
+        hasta que termina. 'on_update' recibe cada estado intermedio y puede lanzar una
+        excepción para dejar de esperar. Devuelve el estado final ('completed' o 'failed').
+        """
+        url = progress.get('url') or f"{self.canvas_url}/api/v1/progress/{progress['id']}"
+        delay = self.PROGRESS_POLL_INTERVAL
+        deadline = time.monotonic() + self.PROGRESS_TIMEOUT
+        while progress.get('workflow_state') not in ('completed', 'failed'):
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"El proceso {progress.get('id')} de Canvas no terminó a tiempo.")
+            time.sleep(delay)
+            delay = min(delay * 2, self.PROGRESS_POLL_MAX_INTERVAL)
+            progress = json_codec.loads(self._send('GET', url).content)
+            if on_update:
+                on_update(progress)
+        return progress
 
     # --------------------------------------------------------------------------
     # MÉTODOS RELACIONADOS CON RÚBRICAS
@@ -41,8 +296,24 @@ class CanvasClient:
         Crea una rúbrica completa con todos sus niveles en una sola petición POST,
         asegurando que tanto los criterios como los ratings se envíen como diccionarios indexados.
         """
+        return self._create_rubric(course_id, title, criteria_data, options)[0]
+
+    def create_rubric_with_id(self, course_id: int, title: str, criteria_data: list, options: dict) -> int | None:
+        """
+        Igual que 'create_rubric', pero devuelve el ID de la rúbrica creada (o el de la
+        idéntica que ya existía en el curso), o None si falla.
+        """
+        created, rubric_id = self._create_rubric(course_id, title, criteria_data, options)
+        if created and not rubric_id:
+            self.error_message = "Canvas creó la rúbrica pero no devolvió su ID."
+            logger.error(self.error_message)
+        return rubric_id
+
+    def _create_rubric(self, course_id: int, title: str, criteria_data: list, options: dict) -> tuple:
+        """Crea la rúbrica y devuelve (éxito, ID de la rúbrica o None)."""
         logger.info(f"Intentando creación de rúbrica en un solo paso para '{title}'")
-        if not self.canvas: return False
+        self.linked_id = None
+        if not self.canvas: return False, None
 
         processed_criteria = {}
         for c_idx, crit in enumerate(criteria_data):
@@ -67,10 +338,9 @@ class CanvasClient:
         if not processed_criteria:
             self.error_message = "No se han proporcionado criterios válidos."
             logger.warning(self.error_message)
-            return False
+            return False, None
 
         api_url = f"{self.canvas_url}/api/v1/courses/{course_id}/rubrics"
-        headers = {'Authorization': f'Bearer {self.api_token}'}
 
         full_payload = {
             'rubric': {
@@ -86,31 +356,80 @@ class CanvasClient:
             }
         }
 
+        indexed = self._seed_content_index(course_id, 'rubric', lambda: self.iter_rubrics_full(course_id))
+
         try:
-            logger.info(f"Enviando payload completo final (POST) a {api_url}: {json.dumps(full_payload, indent=2)}")
-            response = requests.post(api_url, headers=headers, json=full_payload)
-            response.raise_for_status()
-            logger.info(f"¡ÉXITO! Rúbrica creada correctamente. Respuesta: {response.json()}")
-            return True
-        except requests.exceptions.RequestException as e:
-            self.error_message = f"Error de API al crear la rúbrica: {e}\nRespuesta: {e.response.text if e.response else 'N/A'}"
+            existing_id = self.content_index.find_rubric(course_id, title, criteria_data) if indexed else None
+            if existing_id and self._find_indexed(course_id, 'rubric', existing_id,
+                                                  f"/api/v1/courses/{course_id}/rubrics/{existing_id}"):
+                logger.info(f"La rúbrica '{title}' ya existe en el curso {course_id} (ID: {existing_id}). No se crea de nuevo.")
+                self.linked_id = existing_id
+                return True, existing_id
+
+            # El payload se codifica una sola vez: los mismos bytes van al log y a la petición.
+            body = json_codec.dumps(full_payload)
+            logger.info(f"Enviando payload completo final (POST) a {api_url}: {body.decode('utf-8')}")
+            response = self._send('POST', api_url, data=body, headers=JSON_HEADERS)
+            logger.info(f"¡ÉXITO! Rúbrica creada correctamente. Respuesta: {response.text}")
+            self._course_changed(course_id)
+            rubric = json_codec.loads(response.content).get('rubric') or {}
+            if indexed and rubric.get('id'):
+                # Se indexa la rúbrica tal como la guarda Canvas, igual que al rellenar el índice.
+                self.content_index.add_rubric(course_id, rubric.get('title', title),
+                                              rubric.get('data') or criteria_data, rubric['id'])
+            return True, rubric.get('id')
+        except (requests.exceptions.RequestException, ValueError) as e:  # ValueError: la respuesta no es JSON
+            self.error_message = f"Error de API al crear la rúbrica: {e}\nRespuesta: {_error_body(e)}"
             logger.error(self.error_message, exc_info=True)
-            return False
+            return False, None
 
     def get_rubrics(self, course_id: int) -> list | None:
         """Obtiene una lista de todas las rúbricas asociadas a un curso."""
         if not self.canvas: return None
         try:
-            course = self.get_course(course_id)
-            if course:
-                rubrics = course.get_rubrics()
-                return [{"id": rubric.id, "title": rubric.title, "points_possible": rubric.points_possible} for rubric in rubrics]
-            return []
+            return [RubricRecord.from_json(rubric) for rubric in self._paginate(f"/api/v1/courses/{course_id}/rubrics")]
         except Exception as e:
             self.error_message = f"Error al obtener la lista de rúbricas: {e}"
             logger.error(self.error_message, exc_info=True)
             return None
 
+    def iter_rubrics_full(self, course_id: int):
+        """Recorre las rúbricas del curso con todos sus criterios y niveles ('data')."""
+        yield from self._paginate(f"/api/v1/courses/{course_id}/rubrics")
+
+    def associate_rubric(self, course_id: int, rubric_id: int, assignment_ids: list, options: dict | None = None,
+                         progress_callback=None) -> dict | None:
+        """
+        Asocia una rúbrica del curso a varias actividades en paralelo: una petición
+        POST a 'rubric_associations' por actividad, dentro del límite de concurrencia
+        y con reintentos ante el límite de peticiones. Si la actividad ya tenía una
+        rúbrica, Canvas la sustituye. Devuelve el número de actividades asociadas y
+        los errores como lista de (ID de actividad, mensaje).
+        """
+        if not self.canvas: return None
+        options = options or {}
+        api_url = f"{self.canvas_url}/api/v1/courses/{course_id}/rubric_associations"
+        logger.info(f"Asociando la rúbrica {rubric_id} a {len(assignment_ids)} actividades del curso {course_id}.")
+
+        def post_association(assignment_id):
+            payload = {'rubric_association': {
+                'rubric_id': rubric_id,
+                'association_id': assignment_id,
+                'association_type': 'Assignment',
+                'use_for_grading': options.get('use_for_grading', True),
+                'hide_score_total': options.get('hide_score_total', False),
+                'purpose': 'grading'
+            }}
+            return json_codec.loads(self._send('POST', api_url, json=payload).content)
+
+        results = self._run_concurrently(post_association, assignment_ids, progress_callback)
+        errors = [(assignment_ids[index], error) for index, _, error in results if error]
+        for assignment_id, error in errors:
+            logger.error(f"Error al asociar la rúbrica {rubric_id} a la actividad {assignment_id}: {error}")
+        if len(errors) < len(assignment_ids):
+            self._course_changed(course_id)
+        return {'rubric_id': rubric_id, 'associated': len(assignment_ids) - len(errors), 'errors': errors}
+
     # --------------------------------------------------------------------------
     # OTROS MÉTODOS (Cursos, Quizzes, Actividades)
     # --------------------------------------------------------------------------
@@ -118,8 +437,8 @@ class CanvasClient:
     def get_active_courses(self) -> list | None:
         if not self.canvas: return None
         try:
-            courses = self.canvas.get_courses(enrollment_state="active")
-            return [{"id": course.id, "name": course.name} for course in courses]
+            params = {'enrollment_state': 'active', 'include[]': 'term'}
+            return [CourseRecord.from_json(course) for course in self._paginate("/api/v1/courses", params)]
         except Exception as e:
             self.error_message = f"Error al obtener los cursos: {e}"
             logger.error(self.error_message, exc_info=True)
@@ -134,38 +453,201 @@ class CanvasClient:
             logger.error(self.error_message, exc_info=True)
             return None
 
-    def create_quiz(self, course_id: int, quiz_settings: dict) -> bool:
-        if not self.canvas: return False
+    def _post_quiz(self, course_id: int, quiz_settings: dict) -> dict | None:
+        """Crea un quiz clásico y devuelve sus datos, o None si falla."""
+        api_url = f"{self.canvas_url}/api/v1/courses/{course_id}/quizzes"
         try:
-            course = self.get_course(course_id)
-            if course:
-                course.create_quiz(quiz=quiz_settings)
-                return True
-            return False
-        except Exception as e:
-            self.error_message = f"Error al crear el quiz clásico: {e}"
+            quiz = json_codec.loads(self._send('POST', api_url, json={'quiz': quiz_settings}).content)
+            logger.info(f"Quiz clásico '{quiz.get('title')}' creado (ID: {quiz.get('id')}).")
+            self._course_changed(course_id)
+            return quiz
+        except (requests.exceptions.RequestException, ValueError) as e:  # ValueError: la respuesta no es JSON
+            self.error_message = f"Error al crear el quiz clásico: {e}\nRespuesta: {_error_body(e)}"
             logger.error(self.error_message, exc_info=True)
-            return False
+            return None
+
+    def create_quiz(self, course_id: int, quiz_settings: dict) -> bool:
+        if not self.canvas: return False
+        return self._post_quiz(course_id, quiz_settings) is not None
+
+    def add_quiz_questions(self, course_id: int, quiz_id: int, questions: list, progress_callback=None,
+                           position_offset: int | None = None) -> dict | None:
+        """
+        Crea en paralelo las preguntas de un quiz clásico. Cada pregunta conserva su
+        posición original detrás de las 'position_offset' que ya tiene el quiz; si no se
+        indica, se consulta su 'question_count' para no intercalarlas con las existentes.
+        Devuelve el número de preguntas creadas y los errores como lista de
+        (número de pregunta, mensaje), o None si no se puede leer el quiz.
+        """
+        quiz_url = f"{self.canvas_url}/api/v1/courses/{course_id}/quizzes/{quiz_id}"
+        api_url = f"{quiz_url}/questions"
+        if position_offset is None:
+            try:
+                quiz = json_codec.loads(self._send('GET', quiz_url).content)
+                position_offset = quiz.get('question_count') or 0
+            except (requests.exceptions.RequestException, ValueError) as e:
+                self.error_message = f"Error al leer el quiz {quiz_id}: {e}"
+                logger.error(self.error_message, exc_info=True)
+                return None
+        logger.info(f"Creando {len(questions)} preguntas en el quiz {quiz_id} del curso {course_id} "
+                    f"a partir de la posición {position_offset + 1}.")
+
+        def post_question(item):
+            position, question = item
+            payload = {'question': {**question, 'position': position}}
+            return json_codec.loads(self._send('POST', api_url, json=payload).content)
+
+        results = self._run_concurrently(post_question, list(enumerate(questions, start=position_offset + 1)),
+                                         progress_callback)
+        errors = [(index + 1, error) for index, _, error in results if error]
+        for number, error in errors:
+            logger.error(f"Error al crear la pregunta {number} del quiz {quiz_id}: {error}")
+        return {'quiz_id': quiz_id, 'created': len(questions) - len(errors), 'errors': errors}
+
+    def create_quiz_with_questions(self, course_id: int, quiz_settings: dict, questions: list,
+                                   progress_callback=None) -> dict | None:
+        """Crea un quiz clásico y después todas sus preguntas. Devuelve el resumen de 'add_quiz_questions'."""
+        if not self.canvas: return None
+        quiz = self._post_quiz(course_id, quiz_settings)
+        if quiz is None:
+            return None
+        return self.add_quiz_questions(course_id, quiz['id'], questions, progress_callback, position_offset=0)
 
-    def create_new_quiz(self, course_id: int, settings: dict) -> bool:
+    def create_new_quiz(self, course_id: int, settings: dict) -> dict | None:
+        """Crea un Nuevo Quiz y devuelve sus datos (su 'id' es el ID de la actividad asociada)."""
         api_url = f"{self.canvas_url}/api/quiz/v1/courses/{course_id}/quizzes"
-        headers = {'Authorization': f'Bearer {self.api_token}'}
         payload = {'quiz': settings}
         try:
-            response = requests.post(api_url, headers=headers, json=payload)
-            response.raise_for_status()
-            return True
-        except requests.exceptions.RequestException as e:
-            self.error_message = f"Error de API al crear el Nuevo Quiz: {e}\nRespuesta: {e.response.text if e.response else 'N/A'}"
+            response = self._send('POST', api_url, json=payload)
+            self._course_changed(course_id)
+            return json_codec.loads(response.content)
+        except (requests.exceptions.RequestException, ValueError) as e:  # ValueError: la respuesta no es JSON
+            self.error_message = f"Error de API al crear el Nuevo Quiz: {e}\nRespuesta: {_error_body(e)}"
             logger.error(self.error_message, exc_info=True)
-            return False
+            return None
+
+    def get_new_quiz_items(self, course_id: int, assignment_id) -> list:
+        """Devuelve los ítems que ya tiene un Nuevo Quiz."""
+        return list(self._paginate(f"/api/quiz/v1/courses/{course_id}/quizzes/{assignment_id}/items"))
+
+    def add_new_quiz_items(self, course_id: int, assignment_id, items, progress_callback=None,
+                           total: int | None = None) -> dict | None:
+        """
+        Crea ítems en un Nuevo Quiz a partir de un iterable de (número de registro, ítem),
+        en lotes paralelos de NEW_QUIZ_ITEM_BATCH_SIZE para no cargar todo el archivo en
+        memoria. Los ítems idénticos (mismo título y enunciado) a uno que ya está en el
+        quiz se omiten, así que una importación interrumpida se puede repetir y solo se
+        crean los que faltan. Al terminar, los ítems del archivo quedan en el orden del
+        archivo (ver '_order_new_quiz_items'). Los errores se indican por número de registro.
+        """
+        api_url = f"{self.canvas_url}/api/quiz/v1/courses/{course_id}/quizzes/{assignment_id}/items"
+        try:
+            existing_items = self.get_new_quiz_items(course_id, assignment_id)
+        except (requests.exceptions.RequestException, ValueError) as e:  # ValueError: la respuesta no es JSON
+            self.error_message = f"Error de API al leer los ítems del Nuevo Quiz: {e}"
+            logger.error(self.error_message, exc_info=True)
+            return None
+
+        existing_items.sort(key=lambda item: item.get('position') or 0)
+        existing = {}
+        for item in existing_items:
+            existing.setdefault(_item_identity(item), deque()).append(item['id'])
+        next_position = max((item.get('position') or 0 for item in existing_items), default=0)
+        summary = {'assignment_id': assignment_id, 'created': 0, 'skipped': 0, 'errors': []}
+        processed = 0
+        # (número de registro, ID del ítem, si es nuevo) en el orden del archivo
+        sequence = []
+
+        def post_item(entry):
+            number, item = entry
+            return json_codec.loads(self._send('POST', api_url, json={'item': item}).content)
+
+        def send_batch(batch):
+            nonlocal processed
+            offset = processed
+            report = (lambda done, _: progress_callback(offset + done, total)) if progress_callback else None
+            for index, created, error in self._run_concurrently(post_item, batch, report):
+                if error:
+                    summary['errors'].append((batch[index][0], error))
+                    logger.error(f"Error al crear el ítem del registro {batch[index][0]}: {error}")
+                else:
+                    summary['created'] += 1
+                    sequence.append((batch[index][0], created['id'], True))
+            processed += len(batch)
+
+        batch = []
+        for number, item in items:
+            matches = existing.get(_item_identity(item))
+            if matches:
+                sequence.append((number, matches.popleft(), False))
+                summary['skipped'] += 1
+                processed += 1
+                continue
+            next_position += 1
+            batch.append((number, {**item, 'position': next_position}))
+            if len(batch) >= self.NEW_QUIZ_ITEM_BATCH_SIZE:
+                send_batch(batch)
+                batch = []
+        if batch:
+            send_batch(batch)
+        if progress_callback:
+            progress_callback(processed, total)
+        if summary['created'] and summary['skipped']:
+            self._order_new_quiz_items(api_url, [item['id'] for item in existing_items], sequence, summary)
+
+        logger.info(f"Ítems del Nuevo Quiz {assignment_id}: {summary['created']} creados, "
+                    f"{summary['skipped']} ya existentes, {len(summary['errors'])} errores.")
+        return summary
+
+    def _order_new_quiz_items(self, api_url: str, existing_ids: list, sequence: list, summary: dict):
+        """
+        Coloca los ítems recién creados (que se añadieron al final del quiz) en el orden del
+        archivo: cada uno justo detrás del registro anterior que ya existía en el quiz o, si
+        ninguno le precede, delante del siguiente. Los ítems que no vienen del archivo no
+        cambian de sitio. Solo se mueven los ítems a partir de la primera posición que
+        difiere, de menor a mayor, así que al reanudar una importación no se mueve nada.
+        """
+        before, after, leading = {}, {}, []
+        anchor = None
+        for number, item_id, is_new in sorted(sequence):
+            if not is_new:
+                if anchor is None and leading:
+                    before[item_id], leading = leading, []
+                anchor = item_id
+            elif anchor is None:
+                leading.append(item_id)
+            else:
+                after.setdefault(anchor, []).append(item_id)
+        target = [item_id for existing_id in existing_ids
+                  for item_id in (*before.get(existing_id, ()), existing_id, *after.get(existing_id, ()))]
+        target.extend(leading)
+        current = existing_ids + [item_id for _, item_id, is_new in sorted(sequence) if is_new]
+        start = next((index for index, (a, b) in enumerate(zip(current, target)) if a != b), len(target))
+        if start == len(target):
+            return
+        numbers = {item_id: number for number, item_id, _ in sequence}
+        logger.info(f"Reordenando {len(target) - start} ítems para respetar el orden del archivo.")
+        for position, item_id in enumerate(target[start:], start=start + 1):
+            try:
+                self._send('PATCH', f"{api_url}/{item_id}", json={'item': {'position': position}})
+            except requests.exceptions.RequestException as e:
+                number = numbers.get(item_id) or min(number for number, _, is_new in sequence if is_new)
+                summary['errors'].append((number, f"el ítem se creó pero no se pudo mover a su posición: {e}"))
+                logger.error(f"Error al reordenar los ítems del Nuevo Quiz: {e}", exc_info=True)
+                return
+
+    def create_new_quiz_with_items(self, course_id: int, settings: dict, items, progress_callback=None,
+                                   total: int | None = None) -> dict | None:
+        """Crea un Nuevo Quiz y después sus ítems. Devuelve el resumen de 'add_new_quiz_items'."""
+        quiz = self.create_new_quiz(course_id, settings)
+        if not quiz:
+            return None
+        return self.add_new_quiz_items(course_id, quiz['id'], items, progress_callback, total)
 
     def get_quizzes(self, course_id: int) -> list | None:
         if not self.canvas: return None
         try:
-            course = self.get_course(course_id)
-            quizzes = course.get_quizzes()
-            return [{"id": quiz.id, "title": quiz.title} for quiz in quizzes]
+            return [QuizRecord.from_json(quiz) for quiz in self._paginate(f"/api/v1/courses/{course_id}/quizzes")]
         except Exception as e:
             self.error_message = f"Error al obtener la lista de quizzes clásicos: {e}"
             logger.error(self.error_message, exc_info=True)
@@ -173,29 +655,185 @@ class CanvasClient:
 
     def get_new_quizzes(self, course_id: int) -> list | None:
         if not self.canvas: return None
-        api_url = f"{self.canvas_url}/api/quiz/v1/courses/{course_id}/quizzes"
-        headers = {'Authorization': f'Bearer {self.api_token}'}
         try:
-            response = requests.get(api_url, headers=headers)
-            response.raise_for_status()
-            new_quizzes_data = response.json()
-            return [{"id": quiz.get('id'), "title": quiz.get('title')} for quiz in new_quizzes_data]
+            path = f"/api/quiz/v1/courses/{course_id}/quizzes"
+            return [QuizRecord.from_json(quiz, is_new_quiz=True) for quiz in self._paginate(path)]
         except requests.exceptions.RequestException as e:
-            self.error_message = f"Error de API al obtener la lista de Nuevos Quizzes: {e}\nRespuesta: {e.response.text if e.response else 'N/A'}"
+            self.error_message = f"Error de API al obtener la lista de Nuevos Quizzes: {e}\nRespuesta: {_error_body(e)}"
+            logger.error(self.error_message, exc_info=True)
+            return None
+
+    def get_assignments(self, course_id: int) -> list | None:
+        """Obtiene la lista de actividades del curso con sus fechas."""
+        if not self.canvas: return None
+        try:
+            return [AssignmentRecord.from_json(assignment) for assignment in self.iter_assignments(course_id)]
+        except Exception as e:
+            self.error_message = f"Error al obtener la lista de actividades: {e}"
             logger.error(self.error_message, exc_info=True)
             return None
 
     def create_assignment(self, course_id: int, assignment_settings: dict) -> bool:
         logger.info(f"Intentando crear actividad con configuración: {assignment_settings}")
+        self.linked_id = None
         if not self.canvas: return False
+        indexed = self._seed_content_index(course_id, 'assignment', lambda: self.iter_assignments(course_id))
+        api_url = f"{self.canvas_url}/api/v1/courses/{course_id}/assignments"
         try:
-            course = self.get_course(course_id)
-            if course:
-                new_assignment = course.create_assignment(assignment=assignment_settings)
-                logger.info(f"Actividad '{new_assignment.name}' creada con éxito (ID: {new_assignment.id}).")
+            existing_id = self.content_index.find_assignment(course_id, assignment_settings) if indexed else None
+            if existing_id and self._find_indexed(course_id, 'assignment', existing_id,
+                                                  f"/api/v1/courses/{course_id}/assignments/{existing_id}"):
+                logger.info(f"La actividad '{assignment_settings.get('name')}' ya existe en el curso {course_id} "
+                            f"(ID: {existing_id}). No se crea de nuevo.")
+                self.linked_id = existing_id
                 return True
+            response = self._send('POST', api_url, json={'assignment': assignment_settings})
+            new_assignment = json_codec.loads(response.content)
+            logger.info(f"Actividad '{new_assignment.get('name')}' creada con éxito (ID: {new_assignment.get('id')}).")
+            self._course_changed(course_id)
+            if indexed:
+                self.content_index.add_assignment(course_id, assignment_settings, new_assignment.get('id'))
+            return True
+        except (requests.exceptions.RequestException, ValueError) as e:  # ValueError: la respuesta no es JSON
+            self.error_message = f"Error de API al crear la actividad: {e}\nRespuesta: {_error_body(e)}"
+            logger.error(self.error_message, exc_info=True)
             return False
-        except Exception as e:
-            self.error_message = f"Error de API al crear la actividad: {e}"
+
+    def bulk_update_assignment_dates(self, course_id: int, updates: list, progress_callback=None) -> dict | None:
+        """
+        Cambia las fechas de muchas actividades en una sola petición a
+        'assignments/bulk_update' y espera a que Canvas termine el proceso asíncrono.
+        'updates' es la lista de {'id', 'all_dates'} que espera la API. Si alguna
+        actividad no supera la validación, Canvas no aplica ningún cambio y los errores
+        se devuelven como lista de (ID de actividad, mensaje).
+        """
+        if not self.canvas: return None
+        api_url = f"{self.canvas_url}/api/v1/courses/{course_id}/assignments/bulk_update"
+        logger.info(f"Actualizando las fechas de {len(updates)} actividades del curso {course_id}.")
+        report = (lambda p: progress_callback(int(p.get('completion') or 0), 100)) if progress_callback else None
+        try:
+            progress = json_codec.loads(self._send('PUT', api_url, json=updates).content)
+            progress = self._wait_for_progress(progress, report)
+        except (requests.exceptions.RequestException, TimeoutError) as e:
+            detail = e.response.text if isinstance(e, requests.exceptions.RequestException) and e.response is not None else 'N/A'
+            self.error_message = f"Error de API al actualizar las fechas: {e}\nRespuesta: {detail}"
             logger.error(self.error_message, exc_info=True)
-            return False
\ No newline at end of file
+            return None
+
+        self._course_changed(course_id)
+        summary = {'updated': len(updates), 'errors': []}
+        if progress['workflow_state'] == 'failed':
+            results = progress.get('results') or {}
+            errors = results.get('errors') if isinstance(results, dict) else None
+            if isinstance(errors, dict) and errors:
+                summary['errors'] = [(assignment_id, str(error)) for assignment_id, error in errors.items()]
+            else:
+                summary['errors'] = [(None, progress.get('message') or "Canvas no pudo actualizar las fechas.")]
+            summary['updated'] = 0
+            logger.error(f"La actualización de fechas del curso {course_id} falló: {summary['errors']}")
+        else:
+            logger.info(f"Fechas de {len(updates)} actividades del curso {course_id} actualizadas.")
+        return summary
+
+    # --------------------------------------------------------------------------
+    # CALIFICACIONES
+    # --------------------------------------------------------------------------
+
+    def update_grades(self, course_id: int, assignment_id: int, grades: list, progress_callback=None) -> dict | None:
+        """
+        Califica una actividad en bloque con el endpoint asíncrono 'update_grades'. Las
+        calificaciones (estudiante, nota, comentario) se envían en lotes de
+        GRADE_CHUNK_SIZE y se espera a que Canvas termine cada lote consultando su
+        objeto Progress. Al final se leen las entregas una sola vez para confirmar la
+        nota de cada estudiante. Devuelve el número de calificaciones aplicadas y los
+        errores como lista de (estudiante, mensaje).
+        """
+        if not self.canvas: return None
+        api_url = f"{self.canvas_url}/api/v1/courses/{course_id}/assignments/{assignment_id}/submissions/update_grades"
+        chunks = [grades[i:i + self.GRADE_CHUNK_SIZE] for i in range(0, len(grades), self.GRADE_CHUNK_SIZE)]
+        logger.info(f"Enviando {len(grades)} calificaciones a la actividad {assignment_id} en {len(chunks)} lotes.")
+
+        def post_chunk(chunk):
+            grade_data = {}
+            for student, grade, comment in chunk:
+                entry = {}
+                if grade:
+                    entry['posted_grade'] = grade
+                if comment:
+                    entry['text_comment'] = comment
+                grade_data[student] = entry
+            return json_codec.loads(self._send('POST', api_url, json={'grade_data': grade_data}).content)
+
+        summary = {'assignment_id': assignment_id, 'updated': 0, 'errors': []}
+        applied = []
+        done = 0
+        for index, progress, error in self._run_concurrently(post_chunk, chunks):
+            chunk = chunks[index]
+            if not error:
+                report = None
+                if progress_callback:
+                    offset = done
+                    report = lambda p: progress_callback(offset + len(chunk) * int(p.get('completion') or 0) // 100,
+                                                         len(grades))
+                try:
+                    progress = self._wait_for_progress(progress, report)
+                    if progress['workflow_state'] == 'failed':
+                        error = progress.get('message') or "Canvas no pudo aplicar el lote de calificaciones."
+                except (requests.exceptions.RequestException, TimeoutError) as e:
+                    error = str(e)
+            if error:
+                logger.error(f"Error en un lote de {len(chunk)} calificaciones de la actividad {assignment_id}: {error}")
+                summary['errors'].extend((student, error) for student, _, _ in chunk)
+            else:
+                applied.extend(chunk)
+            done += len(chunk)
+            if progress_callback:
+                progress_callback(done, len(grades))
+
+        # Comprobación por estudiante: una sola lectura paginada de las entregas de la actividad.
+        try:
+            submissions = {}
+            path = f"/api/v1/courses/{course_id}/assignments/{assignment_id}/submissions"
+            for submission in self._paginate(path, {'include[]': 'user'}):
+                submissions[str(submission.get('user_id'))] = submission
+                sis_id = (submission.get('user') or {}).get('sis_user_id')
+                if sis_id:
+                    submissions[f"sis_user_id:{sis_id}"] = submission
+        except requests.exceptions.RequestException as e:
+            logger.warning(f"No se pudieron comprobar las entregas de la actividad {assignment_id}: {e}")
+            submissions = None
+
+        for student, grade, _ in applied:
+            if submissions is None or not grade:
+                summary['updated'] += 1
+            elif student not in submissions:
+                summary['errors'].append((student, "el estudiante no tiene entrega en esta actividad"))
+            elif not _grade_matches(grade, submissions[student]):
+                registered = submissions[student].get('entered_grade') or submissions[student].get('grade')
+                summary['errors'].append((student, f"la nota registrada es '{registered}' en lugar de '{grade}'"))
+            else:
+                summary['updated'] += 1
+
+        logger.info(f"Calificaciones de la actividad {assignment_id}: {summary['updated']} aplicadas, "
+                    f"{len(summary['errors'])} errores.")
+        return summary
+
+    # --------------------------------------------------------------------------
+    # EXPORTACIÓN (recorridos completos y paginados)
+    # --------------------------------------------------------------------------
+
+    def iter_quizzes_full(self, course_id: int):
+        """Recorre los quizzes clásicos del curso, cada uno con su lista de preguntas."""
+        for quiz in self._paginate(f"/api/v1/courses/{course_id}/quizzes"):
+            quiz['questions'] = list(self._paginate(f"/api/v1/courses/{course_id}/quizzes/{quiz['id']}/questions"))
+            yield quiz
+
+    def iter_new_quizzes_full(self, course_id: int):
+        """Recorre los Nuevos Quizzes del curso, cada uno con sus ítems."""
+        for quiz in self._paginate(f"/api/quiz/v1/courses/{course_id}/quizzes"):
+            quiz['items'] = list(self._paginate(f"/api/quiz/v1/courses/{course_id}/quizzes/{quiz['id']}/items"))
+            yield quiz
+
+    def iter_assignments(self, course_id: int):
+        """Recorre todas las actividades (tareas) del curso."""
+        yield from self._paginate(f"/api/v1/courses/{course_id}/assignments")
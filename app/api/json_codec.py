@@ -0,0 +1,27 @@
+# app/api/json_codec.py
+
+import json
+
+# Códec JSON usado por el transporte de CanvasClient. Usa orjson si está instalado
+# (mucho más rápido al codificar y decodificar listados grandes) y, si no, la
+# librería estándar. Ambas variantes trabajan con bytes para no recodificar cuerpos.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+BACKEND = "orjson" if orjson else "json"
+
+
+def dumps(obj) -> bytes:
+    """Codifica un objeto como JSON en UTF-8."""
+    if orjson:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def loads(data: bytes | str):
+    """Decodifica JSON desde bytes o texto."""
+    if orjson:
+        return orjson.loads(data)
+    return json.loads(data)
@@ -0,0 +1,54 @@
+# app/api/records.py
+
+from typing import NamedTuple
+
+# Registros ligeros (tuplas con nombre) que devuelven los métodos de listado de
+# CanvasClient. Se construyen directamente desde el JSON de la API conservando solo
+# los campos que usa la aplicación, sin los objetos completos de canvasapi.
+
+
+class CourseRecord(NamedTuple):
+    id: int
+    name: str
+    course_code: str = ""
+    term: str = ""
+
+    @classmethod
+    def from_json(cls, data: dict) -> "CourseRecord":
+        return cls(data['id'], data.get('name') or "", data.get('course_code') or "",
+                   (data.get('term') or {}).get('name') or "")
+
+
+class RubricRecord(NamedTuple):
+    id: int
+    title: str
+    points_possible: float | None = None
+
+    @classmethod
+    def from_json(cls, data: dict) -> "RubricRecord":
+        return cls(data['id'], data.get('title') or "", data.get('points_possible'))
+
+
+class QuizRecord(NamedTuple):
+    id: int
+    title: str
+    is_new_quiz: bool = False
+
+    @classmethod
+    def from_json(cls, data: dict, is_new_quiz: bool = False) -> "QuizRecord":
+        return cls(data['id'], data.get('title') or "", is_new_quiz)
+
+
+class AssignmentRecord(NamedTuple):
+    id: int
+    name: str
+    points_possible: float | None = None
+    due_at: str | None = None
+    unlock_at: str | None = None
+    lock_at: str | None = None
+    published: bool = False
+
+    @classmethod
+    def from_json(cls, data: dict) -> "AssignmentRecord":
+        return cls(data['id'], data.get('name') or "", data.get('points_possible'), data.get('due_at'),
+                   data.get('unlock_at'), data.get('lock_at'), bool(data.get('published')))
@@ -0,0 +1,104 @@
+# app/core/client_registry.py
+
+import hashlib
+import re
+import threading
+from app.api.canvas_client import CanvasClient
+from app.core.content_index import CONTENT_INDEX_FILE, ContentIndex
+from app.core.outbox import OUTBOX_FILE, Outbox
+from app.core.prefetch import CourseCache, Prefetcher
+from app.utils import config_manager
+from app.utils.logger_config import logger
+
+
+def profile_file(base_name: str, profile: str) -> str:
+    """
+    Archivo local propio de un perfil ('outbox.db' -> 'outbox_beta_1a2b3c4d5e6f.db'). Los
+    IDs de curso solo son únicos dentro de una instancia de Canvas, así que cada perfil
+    guarda los suyos por separado. El nombre legible se acompaña de un hash del nombre
+    exacto del perfil para que dos perfiles nunca compartan archivo. El perfil
+    predeterminado conserva el nombre original.
+    """
+    if profile == config_manager.DEFAULT_PROFILE:
+        return base_name
+    stem, dot, extension = base_name.rpartition('.')
+    slug = re.sub(r'[^a-z0-9]+', '_', profile.lower()).strip('_') or 'perfil'
+    digest = hashlib.sha256(profile.encode('utf-8')).hexdigest()[:12]
+    return f"{stem}_{slug}_{digest}{dot}{extension}"
+
+
+class ProfileSession:
+    """
+    Todo lo que pertenece a un perfil: su cliente (con su propio pool de conexiones),
+    la lista de cursos, la bandeja de salida, el índice de contenido y la caché de precarga.
+    """
+
+    def __init__(self, profile: str, client: CanvasClient, courses: list, jobs=None):
+        self.profile = profile
+        self.client = client
+        self.courses = courses
+        client.content_index = ContentIndex(profile_file(CONTENT_INDEX_FILE, profile))
+        self.outbox = Outbox(client, profile_file(OUTBOX_FILE, profile))
+        self.outbox.start()
+        self.course_cache = CourseCache()
+        # Cualquier escritura del cliente (menús, bandeja de salida, restauración) descarta la precarga del curso
+        client.on_course_changed = self.course_cache.invalidate
+        self.prefetcher = Prefetcher(client, self.course_cache, jobs)
+
+    def close(self):
+        self.outbox.stop()
+        self.prefetcher.stop()
+
+
+class ClientRegistry:
+    """
+    Mantiene una sesión abierta por perfil. Cambiar a un perfil ya abierto es inmediato:
+    no se vuelve a validar el token, ni a abrir conexiones, ni a pedir la lista de cursos.
+    """
+
+    def __init__(self, jobs=None):
+        self.jobs = jobs
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def get(self, profile: str) -> ProfileSession | None:
+        with self._lock:
+            return self._sessions.get(profile)
+
+    def add(self, profile: str, client: CanvasClient, courses: list) -> ProfileSession:
+        """Registra un cliente ya conectado (p. ej. el del arranque)."""
+        with self._lock:
+            session = self._sessions.get(profile)
+            if session is None:
+                session = self._sessions[profile] = ProfileSession(profile, client, courses, self.jobs)
+                logger.info(f"Perfil '{profile}' abierto ({len(courses)} cursos).")
+            return session
+
+    def open(self, profile: str) -> ProfileSession:
+        """
+        Devuelve la sesión del perfil, conectándola si aún no está abierta: valida el
+        token y obtiene la lista de cursos. Es bloqueante; la interfaz lo llama desde un trabajo.
+        """
+        session = self.get(profile)
+        if session:
+            return session
+        credentials = config_manager.load_credentials(profile)
+        if not credentials:
+            raise RuntimeError(f"El perfil '{profile}' no tiene credenciales guardadas.")
+        url, token = credentials['canvas_url'], credentials['api_token']
+        client = CanvasClient(url, token)
+        if client.error_message:
+            raise RuntimeError(client.error_message)
+        config_manager.save_validation(url, token, client.user['id'], client.user['name'], profile)
+        courses = client.get_active_courses()
+        if courses is None:
+            raise RuntimeError(client.error_message or "No se pudo obtener la lista de cursos.")
+        return self.add(profile, client, courses)
+
+    def sessions(self) -> list:
+        with self._lock:
+            return list(self._sessions.values())
+
+    def close_all(self):
+        for session in self.sessions():
+            session.close()
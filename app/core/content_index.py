@@ -0,0 +1,224 @@
+# app/core/content_index.py
+
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from app.utils.logger_config import logger
+
+# Archivo SQLite con las huellas del contenido de cada curso
+CONTENT_INDEX_FILE = "content_index.db"
+# Segundos tras los que se vuelve a leer el contenido del curso desde Canvas
+# (recoge lo que se haya borrado o creado fuera de la aplicación)
+SEED_TTL = 24 * 3600
+# Versión del formato de las huellas: si cambia, el índice guardado se descarta y se vuelve a rellenar
+INDEX_VERSION = 2
+
+RUBRIC = "rubric"
+ASSIGNMENT = "assignment"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS content (
+    course_id INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    canvas_id INTEGER,
+    PRIMARY KEY (course_id, kind, hash)
+);
+CREATE TABLE IF NOT EXISTS seeded (
+    course_id INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    seeded_at REAL NOT NULL,
+    PRIMARY KEY (course_id, kind)
+);
+"""
+
+_SPACES_RE = re.compile(r"\s+")
+
+
+def _text(value) -> str:
+    """Normaliza un texto: sin espacios sobrantes y sin distinguir mayúsculas."""
+    return _SPACES_RE.sub(" ", str(value or "")).strip().casefold()
+
+
+def _points(value) -> float | None:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _date(value) -> str | None:
+    """Normaliza una fecha ISO 8601 a UTC ('...Z'); las que no se pueden leer se comparan como texto."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value).strip().replace('Z', '+00:00'))
+    except ValueError:
+        return _text(value)
+    if parsed.tzinfo is None:
+        return parsed.isoformat()
+    return parsed.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def _rating_order(rating: list):
+    """Canvas guarda los niveles de mayor a menor puntuación; se ordenan igual."""
+    return -(rating[2] if rating[2] is not None else 0), rating[0], rating[1]
+
+
+def rubric_fingerprint(title: str, criteria: list, with_ratings: bool = True) -> list:
+    """
+    Forma canónica de una rúbrica. Admite tanto los criterios que recibe
+    'CanvasClient.create_rubric' como el campo 'data' de una rúbrica de la API.
+    Con 'with_ratings=False' solo cuentan los criterios (para las rúbricas escritas a
+    mano, a las que Canvas añade sus niveles por defecto).
+    """
+    fingerprint = []
+    for crit in criteria or []:
+        entry = [_text(crit.get('description')), _text(crit.get('long_description')), _points(crit.get('points'))]
+        if with_ratings:
+            ratings = [[_text(r.get('description')), _text(r.get('long_description')), _points(r.get('points'))]
+                       for r in crit.get('ratings') or []]
+            entry.append(sorted(ratings, key=_rating_order))
+        fingerprint.append(entry)
+    return [_text(title), fingerprint]
+
+
+def _has_ratings(criteria: list) -> bool:
+    return bool(criteria) and all(crit.get('ratings') for crit in criteria)
+
+
+def rubric_fingerprints(title: str, criteria: list) -> list:
+    """Huellas con las que se indexa una rúbrica: la completa (si tiene niveles) y la de solo criterios."""
+    fingerprints = [rubric_fingerprint(title, criteria, with_ratings=False)]
+    if _has_ratings(criteria):
+        fingerprints.append(rubric_fingerprint(title, criteria))
+    return fingerprints
+
+
+def assignment_fingerprint(settings: dict) -> list:
+    """
+    Forma canónica de una actividad (configuración de creación o actividad de la API).
+    Incluye todos los campos que se pueden indicar al crearla, con los valores por
+    defecto de Canvas para los que falten, así que dos actividades con el mismo nombre
+    pero distinta fecha, tipo de calificación o extensiones no se confunden.
+    """
+    canonical = {
+        'name': _text(settings.get('name')),
+        'description': _text(settings.get('description')),
+        'points_possible': _points(settings.get('points_possible')) or 0.0,
+        'grading_type': _text(settings.get('grading_type') or 'points'),
+        'submission_types': sorted(_text(t) for t in settings.get('submission_types') or []),
+        'allowed_extensions': sorted(_text(e).lstrip('.') for e in settings.get('allowed_extensions') or []),
+        'due_at': _date(settings.get('due_at')),
+        'unlock_at': _date(settings.get('unlock_at')),
+        'lock_at': _date(settings.get('lock_at')),
+        'published': bool(settings.get('published')),
+    }
+    return sorted(canonical.items())
+
+
+def content_hash(fingerprint: list) -> str:
+    return hashlib.sha256(json.dumps(fingerprint, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def _canvas_fingerprints(kind: str, item: dict) -> list:
+    if kind == RUBRIC:
+        return rubric_fingerprints(item.get('title'), item.get('data'))
+    return [assignment_fingerprint(item)]
+
+
+class ContentIndex:
+    """
+    Índice local, por curso, de las huellas (hash del contenido normalizado) de las
+    rúbricas y actividades que ya existen en Canvas, con su ID. Se rellena una vez
+    leyendo el curso y después se consulta en memoria antes de cada creación, de modo
+    que un contenido repetido se enlaza con el existente sin hacer ninguna petición.
+    """
+
+    def __init__(self, path: str = CONTENT_INDEX_FILE):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] != INDEX_VERSION:
+            # Huellas de otra versión: ya no coinciden con las actuales, se vuelven a calcular.
+            with self._conn:
+                self._conn.execute("DELETE FROM content")
+                self._conn.execute("DELETE FROM seeded")
+            self._conn.execute(f"PRAGMA user_version = {INDEX_VERSION}")
+        self._lock = threading.Lock()
+        self._seed_lock = threading.Lock()
+        self._hashes = {}  # (curso, tipo) -> {hash: ID en Canvas}
+
+    def _table(self, course_id, kind) -> dict:
+        """Tabla en memoria de un curso y tipo; se carga de disco la primera vez. Requiere el bloqueo."""
+        key = (course_id, kind)
+        if key not in self._hashes:
+            rows = self._conn.execute("SELECT hash, canvas_id FROM content WHERE course_id = ? AND kind = ?",
+                                      (course_id, kind)).fetchall()
+            self._hashes[key] = dict(rows)
+        return self._hashes[key]
+
+    def needs_seed(self, course_id, kind) -> bool:
+        with self._lock:
+            row = self._conn.execute("SELECT seeded_at FROM seeded WHERE course_id = ? AND kind = ?",
+                                     (course_id, kind)).fetchone()
+        return row is None or time.time() - row[0] > SEED_TTL
+
+    def seed(self, course_id, kind, items):
+        """Sustituye las huellas de un curso y tipo por las del contenido actual en Canvas."""
+        items = list(items)
+        hashes = {content_hash(fingerprint): item.get('id')
+                  for item in items for fingerprint in _canvas_fingerprints(kind, item)}
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM content WHERE course_id = ? AND kind = ?", (course_id, kind))
+            self._conn.executemany("INSERT OR REPLACE INTO content VALUES (?, ?, ?, ?)",
+                                   [(course_id, kind, h, canvas_id) for h, canvas_id in hashes.items()])
+            self._conn.execute("INSERT OR REPLACE INTO seeded VALUES (?, ?, ?)", (course_id, kind, time.time()))
+            self._hashes[(course_id, kind)] = hashes
+        logger.info(f"Índice de contenido del curso {course_id} ({kind}): {len(items)} elementos.")
+
+    def ensure_seeded(self, course_id, kind, load_items):
+        """Rellena el índice con 'load_items()' si nunca se ha hecho o está caducado."""
+        with self._seed_lock:
+            if self.needs_seed(course_id, kind):
+                self.seed(course_id, kind, load_items())
+
+    def _find(self, course_id, kind, fingerprint: list):
+        with self._lock:
+            return self._table(course_id, kind).get(content_hash(fingerprint))
+
+    def _add(self, course_id, kind, fingerprints: list, canvas_id):
+        hashes = [content_hash(fingerprint) for fingerprint in fingerprints]
+        with self._lock, self._conn:
+            table = self._table(course_id, kind)
+            for h in hashes:
+                table[h] = canvas_id
+            self._conn.executemany("INSERT OR REPLACE INTO content VALUES (?, ?, ?, ?)",
+                                   [(course_id, kind, h, canvas_id) for h in hashes])
+
+    def discard(self, course_id, kind, canvas_id):
+        """Olvida un elemento que ya no existe en Canvas (todas sus huellas)."""
+        with self._lock, self._conn:
+            table = self._table(course_id, kind)
+            for h in [h for h, indexed_id in table.items() if indexed_id == canvas_id]:
+                del table[h]
+            self._conn.execute("DELETE FROM content WHERE course_id = ? AND kind = ? AND canvas_id = ?",
+                               (course_id, kind, canvas_id))
+
+    # --- Consultas por tipo: devuelven el ID en Canvas de un contenido idéntico, o None ---
+    def find_rubric(self, course_id, title: str, criteria: list):
+        """Con niveles se busca la rúbrica idéntica; sin ellos, una con los mismos criterios."""
+        return self._find(course_id, RUBRIC, rubric_fingerprint(title, criteria, with_ratings=_has_ratings(criteria)))
+
+    def add_rubric(self, course_id, title: str, criteria: list, canvas_id):
+        """'criteria' debería ser el campo 'data' de la rúbrica creada, tal como la guarda Canvas."""
+        self._add(course_id, RUBRIC, rubric_fingerprints(title, criteria), canvas_id)
+
+    def find_assignment(self, course_id, settings: dict):
+        return self._find(course_id, ASSIGNMENT, assignment_fingerprint(settings))
+
+    def add_assignment(self, course_id, settings: dict, canvas_id):
+        self._add(course_id, ASSIGNMENT, [assignment_fingerprint(settings)], canvas_id)
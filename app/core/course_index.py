@@ -0,0 +1,89 @@
+# app/core/course_index.py
+
+import re
+import unicodedata
+
+# Longitud máxima de los prefijos indexados. Las búsquedas más largas se resuelven
+# con el prefijo máximo y se filtran después comparando los tokens completos.
+MAX_PREFIX_LENGTH = 12
+# Número de cursos recientes que se recuerdan para la ordenación.
+MAX_RECENT_COURSES = 10
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> list:
+    """Normaliza un texto (minúsculas, sin tildes) y lo divide en tokens alfanuméricos."""
+    if not text:
+        return []
+    normalized = unicodedata.normalize("NFKD", str(text).lower())
+    normalized = "".join(ch for ch in normalized if not unicodedata.combining(ch))
+    return _TOKEN_RE.findall(normalized)
+
+
+class CourseIndex:
+    """
+    Índice en memoria de prefijos sobre el nombre, el código y el periodo de cada curso.
+    Cada consulta cuesta lo mismo que intersecar unos pocos conjuntos, sin recorrer
+    la lista completa de cursos.
+    """
+
+    def __init__(self, courses: list, recent_ids: list | None = None):
+        """'courses' es una lista de CourseRecord (ver app/api/records.py)."""
+        self.courses = {}
+        self._tokens = {}
+        self._prefixes = {}
+        self._order = {}
+        self.recent_ids = [cid for cid in (recent_ids or [])][:MAX_RECENT_COURSES]
+
+        for position, course in enumerate(sorted(courses, key=lambda c: c.name.lower())):
+            course_id = course.id
+            self.courses[course_id] = course
+            self._order[course_id] = position
+            tokens = set()
+            for field in ('name', 'course_code', 'term'):
+                tokens.update(tokenize(getattr(course, field)))
+            self._tokens[course_id] = tokens
+            for token in tokens:
+                for length in range(1, min(len(token), MAX_PREFIX_LENGTH) + 1):
+                    self._prefixes.setdefault(token[:length], set()).add(course_id)
+
+    def _rank(self, course_id):
+        """Los cursos recientes van primero (en orden de uso) y después por nombre."""
+        try:
+            return (0, self.recent_ids.index(course_id))
+        except ValueError:
+            return (1, self._order[course_id])
+
+    def search(self, query: str) -> list:
+        """Devuelve los cursos cuyos tokens empiezan por cada uno de los términos buscados."""
+        terms = tokenize(query)
+        if not terms:
+            return [self.courses[cid] for cid in sorted(self.courses, key=self._rank)]
+
+        candidate_sets = []
+        for term in terms:
+            matches = self._prefixes.get(term[:MAX_PREFIX_LENGTH])
+            if not matches:
+                return []
+            candidate_sets.append(matches)
+
+        candidate_sets.sort(key=len)
+        candidates = set(candidate_sets[0]).intersection(*candidate_sets[1:])
+
+        long_terms = [term for term in terms if len(term) > MAX_PREFIX_LENGTH]
+        if long_terms:
+            candidates = {
+                cid for cid in candidates
+                if all(any(token.startswith(term) for token in self._tokens[cid]) for term in long_terms)
+            }
+
+        return [self.courses[cid] for cid in sorted(candidates, key=self._rank)]
+
+    def mark_recent(self, course_id) -> list:
+        """Mueve un curso al principio de la lista de recientes y devuelve la lista actualizada."""
+        if course_id in self.recent_ids:
+            self.recent_ids.remove(course_id)
+        self.recent_ids.insert(0, course_id)
+        del self.recent_ids[MAX_RECENT_COURSES:]
+        return list(self.recent_ids)
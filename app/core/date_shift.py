@@ -0,0 +1,85 @@
+# app/core/date_shift.py
+
+import re
+from datetime import date, datetime, timedelta
+
+# Campos de fecha de una actividad que se pueden desplazar
+DATE_FIELDS = ('due_at', 'unlock_at', 'lock_at')
+DATE_FIELD_LABELS = {'due_at': "Entrega", 'unlock_at': "Disponible desde", 'lock_at': "Disponible hasta"}
+
+
+def parse_calendar_mapping(text: str) -> tuple:
+    """
+    Interpreta una correspondencia de calendario con una pareja de fechas por línea,
+    p. ej. '2025-09-15 -> 2026-09-14' (también vale ',', ';' o espacios como separador).
+    Devuelve (correspondencia fecha antigua -> fecha nueva, errores por número de línea).
+    """
+    mapping, errors = {}, []
+    for number, line in enumerate(text.splitlines(), start=1):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        parts = [part for part in re.split(r'\s*(?:->|=>|[,;\s])\s*', line) if part]
+        try:
+            if len(parts) != 2:
+                raise ValueError("se esperaban dos fechas")
+            old, new = (date.fromisoformat(part) for part in parts)
+        except ValueError as e:
+            errors.append((number, f"'{line}': {e}"))
+            continue
+        mapping[old] = new
+    return mapping, errors
+
+
+def shift_datetime(value: str | None, days: int = 0, mapping: dict | None = None) -> str | None:
+    """
+    Desplaza una fecha ISO 8601 de la API. El cálculo se hace en la hora local para
+    conservar la hora de reloj aunque haya un cambio de horario de verano por medio.
+    Con 'mapping' se mueve al día nuevo si su día (local) aparece en la correspondencia;
+    si no aparece, se aplica el desplazamiento en días. Devuelve None si no hay cambio.
+    """
+    if not value:
+        return None
+    local = datetime.fromisoformat(value.replace('Z', '+00:00')).astimezone()
+    offset = days
+    if mapping and local.date() in mapping:
+        offset = (mapping[local.date()] - local.date()).days
+    if not offset:
+        return None
+    shifted = (local.replace(tzinfo=None) + timedelta(days=offset)).astimezone()
+    return shifted.isoformat()
+
+
+def format_local(value: str | None) -> str:
+    """Muestra una fecha ISO 8601 en hora local ('-' si no hay fecha)."""
+    if not value:
+        return "-"
+    return datetime.fromisoformat(value.replace('Z', '+00:00')).astimezone().strftime("%d/%m/%Y %H:%M")
+
+
+def plan_date_changes(assignments: list, fields: tuple = DATE_FIELDS, days: int = 0,
+                      mapping: dict | None = None) -> list:
+    """
+    Calcula los cambios de fecha para cada actividad. Devuelve una lista de
+    (actividad, {campo: (fecha actual, fecha nueva)}) solo con las que cambian.
+    """
+    changes = []
+    for assignment in assignments:
+        fields_changed = {}
+        for field in fields:
+            current = getattr(assignment, field)
+            new = shift_datetime(current, days, mapping)
+            if new:
+                fields_changed[field] = (current, new)
+        if fields_changed:
+            changes.append((assignment, fields_changed))
+    return changes
+
+
+def build_bulk_update(changes: list) -> list:
+    """Construye el cuerpo de 'assignments/bulk_update': solo las fechas base que cambian."""
+    return [
+        {'id': assignment.id,
+         'all_dates': [{'base': True, **{field: new for field, (_, new) in fields_changed.items()}}]}
+        for assignment, fields_changed in changes
+    ]
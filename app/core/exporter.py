@@ -0,0 +1,229 @@
+# app/core/exporter.py
+
+import gzip
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from app.api import json_codec
+from app.core.jobs import JobCancelled
+from app.core.question_import import build_question
+from app.core.new_quiz_import import build_item
+from app.utils.logger_config import logger
+
+# Colecciones que se exportan, en el orden en que se restauran
+COLLECTIONS = ("rubrics", "assignments", "quizzes", "new_quizzes")
+MANIFEST_FILE = "manifest.json"
+
+
+def _collection_sources(client) -> dict:
+    return {
+        "rubrics": client.iter_rubrics_full,
+        "assignments": client.iter_assignments,
+        "quizzes": client.iter_quizzes_full,
+        "new_quizzes": client.iter_new_quizzes_full,
+    }
+
+
+def _open_collection(path: str, mode: str):
+    """Abre un archivo JSONL en modo binario, comprimido con gzip si su nombre termina en '.gz'."""
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 'b')
+    return open(path, mode + 'b')
+
+
+def _write_collection(records, path: str, name: str, progress_callback=None) -> int:
+    """Escribe los registros en el archivo a medida que llegan, sin acumularlos en memoria."""
+    count = 0
+    with _open_collection(path, 'w') as f:
+        for record in records:
+            f.write(json_codec.dumps(record))
+            f.write(b"\n")
+            count += 1
+            if progress_callback:
+                progress_callback(name, count)
+    return count
+
+
+def export_course(client, course_id: int, destination: str, compress: bool = False,
+                  progress_callback=None) -> dict:
+    """
+    Exporta rúbricas, actividades, quizzes clásicos (con preguntas) y Nuevos Quizzes
+    (con ítems) a una carpeta con un archivo JSONL por colección y un 'manifest.json'.
+    Las colecciones se descargan en paralelo y se escriben en streaming.
+    Devuelve el manifiesto, que incluye el número de registros o el error de cada colección.
+    """
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    archive_dir = os.path.join(destination, f"course_{course_id}_{timestamp}")
+    os.makedirs(archive_dir, exist_ok=True)
+    logger.info(f"Exportando el curso {course_id} a '{archive_dir}' (comprimido: {compress}).")
+
+    extension = ".jsonl.gz" if compress else ".jsonl"
+    sources = _collection_sources(client)
+    manifest = {
+        "course_id": course_id,
+        "exported_at": datetime.now().isoformat(timespec="seconds"),
+        "canvas_url": client.canvas_url,
+        "collections": {},
+    }
+
+    with ThreadPoolExecutor(max_workers=len(COLLECTIONS)) as pool:
+        futures = {}
+        for name in COLLECTIONS:
+            path = os.path.join(archive_dir, name + extension)
+            futures[pool.submit(_write_collection, sources[name](course_id), path, name, progress_callback)] = name
+        for future in as_completed(futures):
+            name = futures[future]
+            entry = {"file": name + extension}
+            try:
+                entry["count"] = future.result()
+                logger.info(f"Colección '{name}' exportada: {entry['count']} registros.")
+            except JobCancelled:
+                raise
+            except Exception as e:
+                entry["error"] = str(e)
+                logger.error(f"Error al exportar la colección '{name}': {e}", exc_info=True)
+            manifest["collections"][name] = entry
+
+    with open(os.path.join(archive_dir, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=4, ensure_ascii=False)
+
+    manifest["path"] = archive_dir
+    return manifest
+
+
+# --------------------------------------------------------------------------
+# LECTURA Y RESTAURACIÓN DE ARCHIVOS EXPORTADOS
+# --------------------------------------------------------------------------
+
+def load_manifest(archive_dir: str) -> dict:
+    with open(os.path.join(archive_dir, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def iter_archive(archive_dir: str, collection: str, manifest: dict | None = None):
+    """Recorre los registros de una colección del archivo sin cargarla entera en memoria."""
+    manifest = manifest or load_manifest(archive_dir)
+    entry = manifest.get("collections", {}).get(collection)
+    if not entry or "error" in entry:
+        return
+    with _open_collection(os.path.join(archive_dir, entry["file"]), 'r') as f:
+        for line in f:
+            if line.strip():
+                yield json_codec.loads(line)
+
+
+def rubric_to_create_args(record: dict) -> tuple:
+    """Convierte una rúbrica exportada en los argumentos de 'CanvasClient.create_rubric'."""
+    criteria = []
+    for crit in record.get('data') or []:
+        criteria.append({
+            'description': crit.get('description', ''),
+            'long_description': crit.get('long_description', ''),
+            'points': crit.get('points', 0),
+            'ratings': [
+                {
+                    'description': rating.get('description', ''),
+                    'long_description': rating.get('long_description', ''),
+                    'points': rating.get('points', 0)
+                }
+                for rating in crit.get('ratings') or []
+            ]
+        })
+    options = {'free_form_criterion_comments': bool(record.get('free_form_criterion_comments', True))}
+    return record.get('title', ''), criteria, options
+
+
+# Tipos de entrega de las actividades que Canvas crea por debajo de un quiz clásico o de un
+# Nuevo Quiz (o de otra herramienta externa, que no se puede recrear sin su configuración)
+QUIZ_SUBMISSION_TYPES = {'online_quiz', 'external_tool'}
+
+
+def is_quiz_assignment(record: dict) -> bool:
+    """
+    Indica si una actividad exportada es la que respalda a un quiz. Esas actividades no se
+    restauran como actividades: el quiz se vuelve a crear desde su propia colección.
+    """
+    return bool(QUIZ_SUBMISSION_TYPES.intersection(record.get('submission_types') or [])
+                or record.get('quiz_id') or record.get('is_quiz_assignment')
+                or record.get('is_quiz_lti_assignment'))
+
+
+def assignment_to_settings(record: dict) -> dict:
+    """
+    Convierte una actividad exportada en la configuración de 'create_assignment'.
+    Una actividad de tipo 'discussion_topic' se crea como tal (Canvas genera el foro
+    calificable); si no tiene descripción propia se usa el mensaje del foro.
+    """
+    fields = ('name', 'description', 'points_possible', 'submission_types', 'grading_type',
+              'due_at', 'unlock_at', 'lock_at', 'allowed_extensions')
+    settings = {field: record[field] for field in fields if record.get(field) is not None}
+    if 'discussion_topic' in (record.get('submission_types') or []) and not settings.get('description'):
+        message = (record.get('discussion_topic') or {}).get('message')
+        if message:
+            settings['description'] = message
+    settings['published'] = False
+    return settings
+
+
+def quiz_to_settings(record: dict) -> dict:
+    """Convierte un quiz clásico exportado en la configuración de 'create_quiz'."""
+    fields = ('title', 'description', 'quiz_type', 'time_limit', 'shuffle_answers',
+              'allowed_attempts', 'scoring_policy', 'show_correct_answers')
+    settings = {field: record[field] for field in fields if record.get(field) is not None}
+    settings['published'] = False
+    return settings
+
+
+def new_quiz_to_settings(record: dict) -> dict:
+    """Convierte un Nuevo Quiz exportado en la configuración de 'create_new_quiz'."""
+    fields = ('title', 'instructions', 'points_possible', 'grading_type', 'quiz_settings')
+    return {field: record[field] for field in fields if record.get(field) is not None}
+
+
+def restore_archive(client, course_id: int, archive_dir: str, progress_callback=None) -> dict:
+    """
+    Vuelve a crear en un curso el contenido de un archivo exportado usando los métodos
+    de creación del cliente. Devuelve, por colección, el número de elementos creados,
+    los enlazados (rúbricas y actividades idénticas que ya existían en el curso), los
+    omitidos (actividades que respaldan a un quiz) y la lista de errores. Un quiz
+    cuyas preguntas o ítems fallan no cuenta como creado: cada fallo figura en los errores.
+    """
+    manifest = load_manifest(archive_dir)
+    creators = {
+        "rubrics": lambda r: client.create_rubric(course_id, *rubric_to_create_args(r)),
+        "assignments": lambda r: client.create_assignment(course_id, assignment_to_settings(r)),
+        "quizzes": lambda r: client.create_quiz_with_questions(
+            course_id, quiz_to_settings(r), [build_question(q) for q in r.get('questions') or []]),
+        "new_quizzes": lambda r: client.create_new_quiz_with_items(
+            course_id, new_quiz_to_settings(r),
+            ((position, build_item(position, item)) for position, item in enumerate(r.get('items') or [], start=1))),
+    }
+    results = {}
+    for name in COLLECTIONS:
+        created, linked, skipped, processed, errors = 0, 0, 0, 0, []
+        for record in iter_archive(archive_dir, name, manifest):
+            label = record.get('title') or record.get('name') or record.get('id')
+            processed += 1
+            if name == "assignments" and is_quiz_assignment(record):
+                skipped += 1
+                logger.info(f"Actividad '{label}' omitida: pertenece a un quiz y se restaura con él.")
+            else:
+                client.linked_id = None
+                result = creators[name](record)
+                if not result:
+                    errors.append(f"{label}: {client.error_message}")
+                elif isinstance(result, dict) and result.get('errors'):
+                    # El quiz se creó pero algunas preguntas o ítems no: se informa de cada uno.
+                    errors.extend(f"{label}, pregunta {number}: {message}" for number, message in result['errors'])
+                elif client.linked_id:
+                    linked += 1
+                    logger.info(f"'{label}' ya existía en el curso: enlazado con el ID {client.linked_id}.")
+                else:
+                    created += 1
+            if progress_callback:
+                progress_callback(name, processed)
+        results[name] = {"created": created, "linked": linked, "skipped": skipped, "errors": errors}
+        logger.info(f"Restauración de '{name}': {created} creados, {linked} enlazados con existentes, "
+                    f"{skipped} omitidos, {len(errors)} errores.")
+    return results
@@ -0,0 +1,56 @@
+# app/core/grade_import.py
+
+import csv
+
+# Alias aceptados en la cabecera del CSV para cada campo
+STUDENT_COLUMNS = ('student_id', 'user_id', 'id', 'id_estudiante')
+SIS_COLUMNS = ('sis_user_id', 'sis_id')
+GRADE_COLUMNS = ('grade', 'posted_grade', 'score', 'nota', 'calificacion', 'calificación')
+COMMENT_COLUMNS = ('comment', 'text_comment', 'comentario')
+
+
+def _first(row: dict, columns: tuple) -> str:
+    for column in columns:
+        value = (row.get(column) or '').strip()
+        if value:
+            return value
+    return ''
+
+
+def load_grades(file_path: str) -> tuple:
+    """
+    Lee un CSV de calificaciones con cabecera. Cada fila identifica al estudiante por
+    su ID de Canvas ('student_id') o por su ID SIS ('sis_user_id') e incluye la nota
+    ('grade') y/o un comentario ('comment'). Devuelve (calificaciones, errores): las
+    calificaciones son tuplas (estudiante, nota, comentario), donde el estudiante ya
+    está en el formato que acepta la API ('123' o 'sis_user_id:ABC'); los errores son
+    una lista de (número de fila, mensaje).
+    """
+    grades, errors, seen = [], [], {}
+    with open(file_path, 'r', encoding='utf-8-sig', newline='') as f:
+        # La fila 1 es la cabecera: los números de fila coinciden con los de una hoja de cálculo.
+        for number, row in enumerate(csv.DictReader(f), start=2):
+            row = {(key or '').strip().lower(): (value or '') for key, value in row.items()}
+            student = _first(row, STUDENT_COLUMNS)
+            sis_id = _first(row, SIS_COLUMNS)
+            grade = _first(row, GRADE_COLUMNS)
+            comment = _first(row, COMMENT_COLUMNS)
+
+            if student and not student.isdigit():
+                errors.append((number, f"el ID de estudiante '{student}' no es numérico"))
+                continue
+            if not student and sis_id:
+                student = f"sis_user_id:{sis_id}"
+            if not student:
+                errors.append((number, "falta el ID del estudiante ('student_id' o 'sis_user_id')"))
+                continue
+            if not grade and not comment:
+                errors.append((number, "la fila no tiene nota ni comentario"))
+                continue
+            if student in seen:
+                errors.append((number, f"el estudiante {student} ya aparece en la fila {seen[student]}"))
+                continue
+            seen[student] = number
+            grades.append((student, grade, comment))
+    return grades, errors
+
@@ -0,0 +1,159 @@
+# app/core/jobs.py
+
+import itertools
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from app.utils.logger_config import logger
+
+# Número máximo de trabajos ejecutándose a la vez (el resto espera en cola)
+MAX_CONCURRENT_JOBS = 3
+
+PENDING = "En cola"
+RUNNING = "En curso"
+COMPLETED = "Completado"
+FAILED = "Error"
+CANCELLED = "Cancelado"
+
+
+class JobCancelled(Exception):
+    """Se lanza dentro de un trabajo cuando el usuario ha pedido cancelarlo."""
+
+
+class Job:
+    """
+    Unidad de trabajo enviada desde cualquier menú. La función del trabajo recibe el
+    propio objeto y usa 'report' para informar del progreso; la cancelación es
+    cooperativa: 'report' y 'check_cancelled' lanzan JobCancelled cuando se pide.
+    """
+
+    def __init__(self, job_id: int, title: str, func, on_done=None):
+        self.id = job_id
+        self.title = title
+        self.func = func
+        self.on_done = on_done
+        self.status = PENDING
+        self.done = 0
+        self.total = None
+        self.message = ""
+        self.result = None
+        self.error = None
+        self.started_at = None
+        self.finished_at = None
+        self._cancel_event = threading.Event()
+
+    # --- API para la función del trabajo ---
+    def report(self, done: int, total: int | None = None, message: str | None = None):
+        self.check_cancelled()
+        self.done = done
+        if total is not None:
+            self.total = total
+        if message is not None:
+            self.message = message
+
+    def check_cancelled(self):
+        if self._cancel_event.is_set():
+            raise JobCancelled()
+
+    @property
+    def cancel_requested(self) -> bool:
+        return self._cancel_event.is_set()
+
+    # --- Métricas para el panel ---
+    @property
+    def finished(self) -> bool:
+        return self.status in (COMPLETED, FAILED, CANCELLED)
+
+    @property
+    def elapsed(self) -> float:
+        if not self.started_at:
+            return 0.0
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    @property
+    def throughput(self) -> float:
+        """Elementos procesados por segundo desde que empezó el trabajo."""
+        return self.done / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def eta(self) -> float | None:
+        """Segundos estimados hasta terminar, o None si no se conoce el total."""
+        if not self.total or not self.throughput or self.finished:
+            return None
+        return max(self.total - self.done, 0) / self.throughput
+
+
+class JobManager:
+    """
+    Cola de trabajos compartida por todos los menús. Los trabajos se ejecutan en un
+    único pool con un límite global de concurrencia. Los callbacks 'on_done' no se
+    llaman desde los hilos de trabajo: se entregan con 'pop_finished' para que la
+    interfaz los ejecute en su propio hilo.
+    """
+
+    def __init__(self, max_workers: int = MAX_CONCURRENT_JOBS):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._ids = itertools.count(1)
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._finished = queue.Queue()
+
+    def submit(self, title: str, func, on_done=None) -> Job:
+        job = Job(next(self._ids), title, func, on_done)
+        with self._lock:
+            self._jobs[job.id] = job
+        logger.info(f"Trabajo #{job.id} en cola: '{title}'.")
+        self._pool.submit(self._run, job)
+        return job
+
+    def _run(self, job: Job):
+        if job.cancel_requested:
+            job.status = CANCELLED
+        else:
+            job.status = RUNNING
+            job.started_at = time.monotonic()
+            try:
+                job.result = job.func(job)
+                job.status = COMPLETED
+            except JobCancelled:
+                job.status = CANCELLED
+            except Exception as e:
+                job.error = e
+                job.status = FAILED
+                logger.error(f"Error en el trabajo #{job.id} '{job.title}': {e}", exc_info=True)
+            job.finished_at = time.monotonic()
+        logger.info(f"Trabajo #{job.id} '{job.title}' terminado: {job.status}.")
+        self._finished.put(job)
+
+    def cancel(self, job_id: int):
+        job = self._jobs.get(job_id)
+        if job and not job.finished:
+            logger.info(f"Cancelación solicitada para el trabajo #{job_id}.")
+            job._cancel_event.set()
+
+    def jobs(self) -> list:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def active_count(self) -> int:
+        return sum(1 for job in self.jobs() if not job.finished)
+
+    def pop_finished(self) -> list:
+        """Devuelve los trabajos terminados desde la última llamada."""
+        finished = []
+        while True:
+            try:
+                finished.append(self._finished.get_nowait())
+            except queue.Empty:
+                return finished
+
+    def clear_finished(self):
+        with self._lock:
+            for job_id in [job.id for job in self._jobs.values() if job.finished]:
+                del self._jobs[job_id]
+
+    def shutdown(self):
+        for job in self.jobs():
+            self.cancel(job.id)
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,172 @@
+# app/core/new_quiz_import.py
+
+import json
+import uuid
+from app.core.question_import import TRUE_VALUES, correct_indexes, iter_csv_rows
+
+# Tipos de ítem admitidos y su 'interaction_type_slug' en la API de Nuevos Quizzes
+ITEM_TYPES = {
+    'multiple_choice': 'choice',
+    'mc': 'choice',
+    'choice': 'choice',
+    'true_false': 'true-false',
+    'tf': 'true-false',
+    'true-false': 'true-false',
+    'essay': 'essay',
+    'numerical': 'numeric',
+    'numeric': 'numeric',
+}
+
+# Espacio de nombres para generar IDs de opciones estables entre ejecuciones
+_CHOICE_NAMESPACE = uuid.UUID("6f1c2a0e-5d0b-4c51-9a63-1f0b8c7a2e10")
+
+
+def _html(text: str) -> str:
+    text = str(text).strip()
+    return text if text.startswith('<') else f"<p>{text}</p>"
+
+
+def build_item(position: int, fields: dict) -> dict:
+    """
+    Construye un ítem de Nuevo Quiz a partir del mismo formato simplificado que las
+    preguntas clásicas ('type', 'name', 'text', 'points', 'correct', 'answers').
+    Los ítems ya exportados desde Canvas (con 'entry') se reutilizan tal cual.
+    """
+    if 'entry' in fields:
+        item = {key: value for key, value in fields.items() if key not in ('id', 'position')}
+        item['entry'] = {key: value for key, value in item['entry'].items() if key != 'id'}
+        item['position'] = position
+        return item
+
+    text = (fields.get('text') or '').strip()
+    if not text:
+        raise ValueError("el enunciado ('text') está vacío")
+    item_type = (fields.get('type') or 'multiple_choice').strip().lower()
+    if item_type not in ITEM_TYPES:
+        raise ValueError(f"tipo de ítem no soportado '{item_type}'")
+    slug = ITEM_TYPES[item_type]
+    correct = fields.get('correct', '')
+
+    entry = {
+        'title': (fields.get('name') or text[:50]).strip(),
+        'item_body': _html(text),
+        'calculator_type': 'none',
+        'interaction_type_slug': slug,
+        'properties': {},
+    }
+
+    if slug == 'choice':
+        options = [str(option).strip() for option in fields.get('answers') or [] if str(option).strip()]
+        if len(options) < 2:
+            raise ValueError("se necesitan al menos dos opciones de respuesta")
+        indexes = correct_indexes(correct, options, fields.get('correct_index'))
+        if len(indexes) > 1:
+            raise ValueError("una pregunta de opción múltiple solo admite una respuesta correcta")
+        choice_ids = [str(uuid.uuid5(_CHOICE_NAMESPACE, f"{position}:{i}:{option}")) for i, option in enumerate(options)]
+        entry['interaction_data'] = {
+            'choices': [
+                {'id': choice_ids[i], 'position': i + 1, 'item_body': _html(option)}
+                for i, option in enumerate(options)
+            ]
+        }
+        entry['properties'] = {
+            'shuffle_rules': {'choices': {'to_lock': [], 'shuffled': False}},
+            'vary_points_by_answer': False,
+        }
+        entry['scoring_data'] = {'value': choice_ids[indexes.pop()]}
+        entry['scoring_algorithm'] = 'Equivalence'
+    elif slug == 'true-false':
+        entry['interaction_data'] = {'true_choice': 'Verdadero', 'false_choice': 'Falso'}
+        entry['scoring_data'] = {'value': str(correct).strip().lower() in TRUE_VALUES}
+        entry['scoring_algorithm'] = 'Equivalence'
+    elif slug == 'essay':
+        entry['interaction_data'] = {'rce': True, 'essay': None, 'word_count': False,
+                                     'file_upload': False, 'spell_check': False}
+        entry['scoring_data'] = {'value': ''}
+        entry['scoring_algorithm'] = 'None'
+    elif slug == 'numeric':
+        value = str(float(correct))
+        margin = fields.get('margin')
+        answer = {'id': str(uuid.uuid5(_CHOICE_NAMESPACE, f"{position}:numeric")), 'type': 'exactResponse', 'value': value}
+        if margin:
+            answer.update({'type': 'marginOfError', 'margin': str(float(margin)), 'margin_type': 'absolute'})
+        entry['interaction_data'] = {}
+        entry['scoring_data'] = {'value': [answer]}
+        entry['scoring_algorithm'] = 'Numeric'
+
+    return {
+        'position': position,
+        'points_possible': float(fields.get('points') or 1),
+        'entry_type': 'Item',
+        'entry': entry,
+    }
+
+
+def _iter_records(file_path: str):
+    """Recorre los registros del archivo uno a uno (JSONL y CSV sin cargarlo entero)."""
+    lower = file_path.lower()
+    if lower.endswith('.jsonl'):
+        with open(file_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    elif lower.endswith('.csv'):
+        yield from iter_csv_rows(file_path)
+    elif lower.endswith('.json'):
+        with open(file_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            data = data.get('items', data.get('questions', []))
+        yield from data
+    else:
+        raise ValueError("Formato no soportado. Usa un archivo .csv, .json o .jsonl.")
+
+
+def iter_items(file_path: str):
+    """
+    Recorre el archivo y devuelve (número de registro, ítem, error) por cada registro.
+    El número de registro identifica el registro en los errores; la posición del ítem
+    en el quiz se asigna al enviarlo.
+    """
+    for position, fields in enumerate(_iter_records(file_path), start=1):
+        try:
+            yield position, build_item(position, fields), None
+        except (ValueError, TypeError, KeyError) as e:
+            yield position, None, str(e)
+
+
+def scan_items(file_path: str) -> tuple:
+    """Valida el archivo sin guardar los ítems. Devuelve (número de ítems válidos, errores)."""
+    valid, errors = 0, []
+    for position, item, error in iter_items(file_path):
+        if error:
+            errors.append((position, error))
+        else:
+            valid += 1
+    return valid, errors
+
+
+def import_items(client, course_id: int, file_path: str, assignment_id=None, settings: dict | None = None,
+                 progress_callback=None, total: int | None = None) -> dict | None:
+    """
+    Importa los ítems del archivo en el Nuevo Quiz 'assignment_id' o, si no se indica,
+    en un Nuevo Quiz creado con 'settings'. Los ítems que ya existen en el quiz (mismo
+    título y enunciado) se omiten, por lo que repetir la importación tras un fallo
+    parcial solo crea los que faltan. Los errores de formato se suman a los de la API.
+    """
+    parse_errors = []
+
+    def valid_items():
+        for position, item, error in iter_items(file_path):
+            if error:
+                parse_errors.append((position, error))
+            else:
+                yield position, item
+
+    if assignment_id:
+        result = client.add_new_quiz_items(course_id, assignment_id, valid_items(), progress_callback, total)
+    else:
+        result = client.create_new_quiz_with_items(course_id, settings, valid_items(), progress_callback, total)
+    if result is not None:
+        result['errors'] = sorted(parse_errors + result['errors'])
+    return result
@@ -0,0 +1,235 @@
+# app/core/outbox.py
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from app.utils.logger_config import logger
+
+# Archivo SQLite con las operaciones de creación pendientes de enviar
+OUTBOX_FILE = "outbox.db"
+# Operaciones que se envían en cada lote
+OUTBOX_BATCH_SIZE = 20
+# Segundos entre comprobaciones cuando no hay novedades
+FLUSH_INTERVAL = 10
+# Intentos antes de marcar una operación como fallida
+MAX_ATTEMPTS = 5
+# Las operaciones enviadas se conservan este tiempo (segundos) para el historial
+SENT_RETENTION = 7 * 24 * 3600
+
+PENDING = "pending"
+SENDING = "sending"
+SENT = "sent"
+FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    course_id INTEGER NOT NULL,
+    label TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    dedup_key TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    linked_id INTEGER,
+    next_attempt_at REAL NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS outbox_status ON outbox (status, id);
+CREATE INDEX IF NOT EXISTS outbox_dedup ON outbox (dedup_key, status);
+"""
+
+
+def dedup_key(kind: str, course_id: int, payload: dict) -> str:
+    """Clave de deduplicación: mismo tipo, curso y contenido producen la misma clave."""
+    canonical = json.dumps([kind, course_id, payload], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class Outbox:
+    """
+    Bandeja de salida persistente para las operaciones de creación. 'enqueue' guarda
+    la operación en disco y vuelve al instante; un hilo en segundo plano las envía
+    por lotes, en orden, cuando Canvas es accesible. Las operaciones idénticas que
+    siguen pendientes no se duplican y los fallos se reintentan con espera creciente.
+    """
+
+    def __init__(self, client, path: str = OUTBOX_FILE):
+        self.client = client
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(outbox)")}
+        if 'linked_id' not in columns:  # Bandejas creadas antes de registrar los enlaces
+            self._conn.execute("ALTER TABLE outbox ADD COLUMN linked_id INTEGER")
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._linked = []  # (tipo, etiqueta, ID existente) enlazados desde la última consulta
+        # Los envíos interrumpidos al cerrar la aplicación vuelven a la cola.
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE outbox SET status = ? WHERE status = ?", (PENDING, SENDING))
+            self._conn.execute("DELETE FROM outbox WHERE status = ? AND updated_at < ?",
+                               (SENT, time.time() - SENT_RETENTION))
+        self._senders = {
+            'rubric': lambda course_id, p: client.create_rubric(course_id, p['title'], p['criteria_data'], p['options']),
+            'quiz': lambda course_id, p: client.create_quiz(course_id, p),
+            'new_quiz': lambda course_id, p: client.create_new_quiz(course_id, p),
+            'assignment': lambda course_id, p: client.create_assignment(course_id, p),
+        }
+
+    # --- API para la interfaz ---
+    def enqueue(self, kind: str, course_id: int, payload: dict, label: str) -> bool:
+        """
+        Añade una operación a la bandeja. Devuelve False si ya había una idéntica
+        pendiente (no se añade de nuevo).
+        """
+        if kind not in self._senders:
+            raise ValueError(f"Tipo de operación desconocido: {kind}")
+        key = dedup_key(kind, course_id, payload)
+        now = time.time()
+        with self._lock, self._conn:
+            duplicate = self._conn.execute(
+                "SELECT 1 FROM outbox WHERE dedup_key = ? AND status IN (?, ?)", (key, PENDING, SENDING)).fetchone()
+            if duplicate:
+                logger.info(f"Operación duplicada ignorada en la bandeja de salida: {kind} '{label}'.")
+                return False
+            self._conn.execute(
+                "INSERT INTO outbox (kind, course_id, label, payload, dedup_key, status, next_attempt_at, created_at, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (kind, course_id, label, json.dumps(payload, ensure_ascii=False), key, PENDING, now, now, now))
+        logger.info(f"Operación en la bandeja de salida: {kind} '{label}' (curso {course_id}).")
+        self._wakeup.set()
+        return True
+
+    def counts(self) -> dict:
+        """Número de operaciones por estado."""
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall()
+        return dict(rows)
+
+    def failed_entries(self) -> list:
+        """Devuelve (id, tipo, etiqueta, último error) de las operaciones fallidas."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT id, kind, label, last_error FROM outbox WHERE status = ? ORDER BY id", (FAILED,)).fetchall()
+
+    def pop_linked(self) -> list:
+        """
+        Devuelve (tipo, etiqueta, ID) de las operaciones enviadas desde la última llamada
+        que no crearon nada porque el contenido ya existía y se enlazaron con ese ID.
+        """
+        with self._lock:
+            linked, self._linked = self._linked, []
+        return linked
+
+    def retry_failed(self):
+        """Devuelve las operaciones fallidas a la cola, conservando su orden original."""
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE outbox SET status = ?, attempts = 0, next_attempt_at = ? WHERE status = ?",
+                               (PENDING, time.time(), FAILED))
+        self._wakeup.set()
+
+    def discard_failed(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM outbox WHERE status = ?", (FAILED,))
+
+    # --- Envío en segundo plano ---
+    def start(self):
+        self._thread = threading.Thread(target=self._flush_loop, name="outbox", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wakeup.set()
+
+    def _flush_loop(self):
+        while not self._stop.is_set():
+            self._wakeup.wait(FLUSH_INTERVAL)
+            self._wakeup.clear()
+            try:
+                while not self._stop.is_set() and self.flush_batch():
+                    pass
+            except Exception as e:
+                logger.error(f"Error al vaciar la bandeja de salida: {e}", exc_info=True)
+
+    def _next_batch(self) -> list:
+        """
+        Toma las primeras operaciones pendientes en orden de llegada. Si la primera aún
+        está esperando su reintento, el lote se corta ahí para no adelantarla.
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            rows = self._conn.execute(
+                "SELECT id, kind, course_id, label, payload, attempts, next_attempt_at FROM outbox"
+                " WHERE status = ? ORDER BY id LIMIT ?", (PENDING, OUTBOX_BATCH_SIZE)).fetchall()
+            ready = []
+            for row in rows:
+                if row[6] > now:
+                    break
+                ready.append(row[:6])
+            self._conn.executemany("UPDATE outbox SET status = ? WHERE id = ?", [(SENDING, row[0]) for row in ready])
+        return ready
+
+    def flush_batch(self) -> bool:
+        """
+        Envía un lote de operaciones en orden. Si Canvas no responde, el lote no se toca y
+        no se gastan intentos. Ante un fallo, el resto del lote espera detrás de la
+        operación fallida. Devuelve True si el lote entero se envió con éxito.
+        """
+        if not self.counts().get(PENDING):
+            return False
+        if not self.client.is_reachable():
+            logger.info("Canvas no está accesible. La bandeja de salida se reintentará más tarde.")
+            return False
+
+        batch = self._next_batch()
+        if not batch:
+            return False
+        logger.info(f"Enviando lote de {len(batch)} operaciones de la bandeja de salida.")
+
+        updates = []
+        for entry_id, kind, course_id, label, payload, attempts in batch:
+            if self._stop.is_set():
+                break
+            now = time.time()
+            # El error y el enlace del cliente son propios de cada hilo: se limpian para leer solo los de este envío.
+            self.client.error_message = None
+            self.client.linked_id = None
+            try:
+                sent = self._senders[kind](course_id, json.loads(payload))
+                error = self.client.error_message
+            except Exception as e:
+                # Un fallo inesperado cuenta como un intento fallido y no deja el lote en 'sending'.
+                logger.error(f"Error inesperado al enviar '{label}'", exc_info=True)
+                sent, error = False, str(e) or type(e).__name__
+            if sent:
+                linked_id = self.client.linked_id
+                if linked_id:
+                    logger.info(f"'{label}' ya existía en el curso {course_id}: enlazado con el ID {linked_id}.")
+                    with self._lock:
+                        self._linked.append((kind, label, linked_id))
+                updates.append((SENT, attempts + 1, None, linked_id, now, now, entry_id))
+                continue
+            error = error or "Error desconocido"
+            attempts += 1
+            if attempts >= MAX_ATTEMPTS:
+                logger.error(f"Operación '{label}' marcada como fallida tras {attempts} intentos: {error}")
+                updates.append((FAILED, attempts, error, None, now, now, entry_id))
+            else:
+                logger.warning(f"Fallo al enviar '{label}' (intento {attempts}). Se reintentará: {error}")
+                updates.append((PENDING, attempts, error, None, now + FLUSH_INTERVAL * 2 ** (attempts - 1), now, entry_id))
+            break
+
+        processed = {update[-1] for update in updates}
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE outbox SET status = ?, attempts = ?, last_error = ?, linked_id = ?, next_attempt_at = ?, updated_at = ?"
+                " WHERE id = ?", updates)
+            self._conn.executemany("UPDATE outbox SET status = ? WHERE id = ?",
+                                   [(PENDING, row[0]) for row in batch if row[0] not in processed])
+        return len(updates) == len(batch) and all(update[0] == SENT for update in updates)
@@ -0,0 +1,143 @@
+# app/core/prefetch.py
+
+import threading
+import time
+from collections import OrderedDict, deque
+from app.utils.logger_config import logger
+
+# Cursos que se conservan en la caché (se descartan los usados hace más tiempo)
+MAX_CACHED_COURSES = 8
+# Segundos durante los que los datos precargados se consideran actuales
+PREFETCH_TTL = 300
+# Peticiones de precarga que esperan a la vez; las más antiguas se descartan
+MAX_PENDING_PREFETCHES = 3
+# Espera (segundos) mientras haya trabajos del usuario en curso
+IDLE_POLL_INTERVAL = 0.5
+
+
+class CourseCache:
+    """
+    Caché LRU acotada con los datos de cada curso ('rubrics', 'quizzes', 'assignments').
+    Es segura entre hilos y las entradas caducan pasados PREFETCH_TTL segundos o cuando
+    el contenido del curso cambia ('invalidate').
+    """
+
+    def __init__(self, max_courses: int = MAX_CACHED_COURSES, ttl: float = PREFETCH_TTL):
+        self.max_courses = max_courses
+        self.ttl = ttl
+        self._entries = OrderedDict()  # ID de curso -> (momento de la carga, datos)
+        self._invalidated = {}  # ID de curso -> momento del último cambio conocido
+        self._lock = threading.Lock()
+
+    def get(self, course_id) -> dict | None:
+        with self._lock:
+            entry = self._entries.get(course_id)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[0] > self.ttl:
+                del self._entries[course_id]
+                return None
+            self._entries.move_to_end(course_id)
+            return entry[1]
+
+    def put(self, course_id, data: dict, fetched_at: float | None = None):
+        """
+        Guarda los datos de un curso. 'fetched_at' es el momento (time.monotonic) en que se
+        empezaron a leer: si el curso cambió después, los datos ya no son actuales y se descartan.
+        """
+        fetched_at = time.monotonic() if fetched_at is None else fetched_at
+        with self._lock:
+            if fetched_at <= self._invalidated.get(course_id, float('-inf')):
+                logger.debug(f"Precarga del curso {course_id} descartada: el curso cambió durante la lectura.")
+                return
+            self._entries[course_id] = (fetched_at, data)
+            self._entries.move_to_end(course_id)
+            while len(self._entries) > self.max_courses:
+                evicted, _ = self._entries.popitem(last=False)
+                logger.debug(f"Curso {evicted} descartado de la caché de precarga.")
+
+    def invalidate(self, course_id):
+        """Descarta los datos de un curso cuyo contenido ha cambiado (creación, fechas, asociaciones)."""
+        with self._lock:
+            self._invalidated[course_id] = time.monotonic()
+            if self._entries.pop(course_id, None):
+                logger.debug(f"Datos precargados del curso {course_id} descartados tras un cambio.")
+
+    def __contains__(self, course_id) -> bool:
+        return self.get(course_id) is not None
+
+
+class Prefetcher:
+    """
+    Precarga especulativa y de baja prioridad de las listas de un curso. Un único hilo
+    atiende primero la petición más reciente y solo trabaja cuando no hay trabajos del
+    usuario en curso, así que nunca compite con lo que el usuario ha pedido.
+    """
+
+    def __init__(self, client, cache: CourseCache, jobs=None):
+        self.client = client
+        self.cache = cache
+        self.jobs = jobs
+        self._pending = deque(maxlen=MAX_PENDING_PREFETCHES)
+        self._in_flight = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="prefetch", daemon=True)
+        self._thread.start()
+
+    def request(self, course_id):
+        """Pide precargar un curso. Se ignora si ya está en caché o en camino."""
+        with self._lock:
+            if course_id == self._in_flight or course_id in self.cache:
+                return
+            if course_id in self._pending:
+                self._pending.remove(course_id)
+            self._pending.appendleft(course_id)
+        self._wakeup.set()
+
+    def stop(self):
+        self._stop.set()
+        self._wakeup.set()
+
+    def _next(self):
+        with self._lock:
+            self._in_flight = self._pending.popleft() if self._pending else None
+            return self._in_flight
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wakeup.wait()
+            self._wakeup.clear()
+            while not self._stop.is_set():
+                while self.jobs and self.jobs.active_count() and not self._stop.is_set():
+                    time.sleep(IDLE_POLL_INTERVAL)
+                course_id = self._next()
+                if course_id is None:
+                    break
+                try:
+                    self._fetch(course_id)
+                except Exception as e:
+                    logger.warning(f"Precarga del curso {course_id} fallida: {e}")
+                finally:
+                    with self._lock:
+                        self._in_flight = None
+
+    def _fetch(self, course_id):
+        if course_id in self.cache:
+            return
+        started = time.monotonic()
+        data = {}
+        rubrics = self.client.get_rubrics(course_id)
+        if rubrics is not None:
+            data['rubrics'] = rubrics
+        classic_quizzes = self.client.get_quizzes(course_id)
+        new_quizzes = self.client.get_new_quizzes(course_id)
+        if classic_quizzes is not None and new_quizzes is not None:
+            data['quizzes'] = (classic_quizzes, new_quizzes)
+        assignments = self.client.get_assignments(course_id)
+        if assignments is not None:
+            data['assignments'] = assignments
+        if data:
+            self.cache.put(course_id, data, started)
+            logger.info(f"Curso {course_id} precargado en {time.monotonic() - started:.2f}s.")
@@ -0,0 +1,256 @@
+# app/core/question_import.py
+
+import csv
+import json
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+
+# Alias aceptados en la columna/campo 'type' y su tipo de pregunta de Canvas
+QUESTION_TYPES = {
+    'multiple_choice': 'multiple_choice_question',
+    'mc': 'multiple_choice_question',
+    'multiple_answers': 'multiple_answers_question',
+    'ma': 'multiple_answers_question',
+    'true_false': 'true_false_question',
+    'tf': 'true_false_question',
+    'short_answer': 'short_answer_question',
+    'essay': 'essay_question',
+    'numerical': 'numerical_question',
+    'numeric': 'numerical_question',
+}
+
+TRUE_VALUES = ('true', 'verdadero', 'v', 't', '1', 'si', 'sí')
+
+
+def _question_type(value: str) -> str:
+    value = (value or 'multiple_choice').strip().lower()
+    if value in QUESTION_TYPES.values():
+        return value
+    if value not in QUESTION_TYPES:
+        raise ValueError(f"tipo de pregunta desconocido '{value}'")
+    return QUESTION_TYPES[value]
+
+
+def _option_index(part: str) -> int | None:
+    """Interpreta una referencia a una opción por posición: número (1, 2...) o letra (a, b...)."""
+    if part.isdigit():
+        return int(part) - 1
+    if len(part) == 1 and part.isalpha():
+        return ord(part.lower()) - ord('a')
+    return None
+
+
+def correct_indexes(correct, options: list, correct_index=None) -> set:
+    """
+    Interpreta la respuesta correcta. 'correct' se compara primero con el texto exacto de
+    las opciones (así '2' es la opción cuyo texto es '2', si la hay) y, si no coincide,
+    se interpreta como número (1, 2...) o letra (a, b...). 'correct_index', si se indica,
+    solo admite posiciones y tiene prioridad.
+    """
+    indexes = set()
+    by_position = correct_index not in (None, '')
+    for part in str(correct_index if by_position else correct).split('|'):
+        part = part.strip()
+        if not part:
+            continue
+        if not by_position and part in options:
+            indexes.add(options.index(part))
+            continue
+        index = _option_index(part)
+        if index is None:
+            raise ValueError(f"la respuesta correcta '{part}' no coincide con ninguna opción")
+        indexes.add(index)
+    if not indexes or any(i < 0 or i >= len(options) for i in indexes):
+        raise ValueError("no se ha indicado una respuesta correcta válida")
+    return indexes
+
+
+def build_question(fields: dict) -> dict:
+    """
+    Construye una pregunta de quiz clásico a partir de un formato simplificado:
+    'type', 'name', 'text', 'points', 'correct' y las opciones en 'answers'.
+    Si ya viene en formato Canvas ('question_text' y 'question_type') se respeta tal cual.
+    """
+    if 'question_text' in fields and 'question_type' in fields:
+        return {key: value for key, value in fields.items() if key not in ('id', 'quiz_id', 'position', 'assessment_question_id')}
+
+    text = (fields.get('text') or '').strip()
+    if not text:
+        raise ValueError("el enunciado ('text') está vacío")
+    question_type = _question_type(fields.get('type'))
+    points = float(fields.get('points') or 1)
+    options = [str(option).strip() for option in fields.get('answers') or [] if str(option).strip()]
+    correct = fields.get('correct', '')
+
+    question = {
+        'question_name': (fields.get('name') or text[:50]).strip(),
+        'question_text': text,
+        'question_type': question_type,
+        'points_possible': points,
+    }
+
+    if question_type in ('multiple_choice_question', 'multiple_answers_question'):
+        if len(options) < 2:
+            raise ValueError("se necesitan al menos dos opciones de respuesta")
+        indexes = correct_indexes(correct, options, fields.get('correct_index'))
+        if question_type == 'multiple_choice_question' and len(indexes) > 1:
+            raise ValueError("una pregunta de opción múltiple solo admite una respuesta correcta")
+        question['answers'] = [
+            {'answer_text': option, 'answer_weight': 100 if i in indexes else 0}
+            for i, option in enumerate(options)
+        ]
+    elif question_type == 'true_false_question':
+        is_true = str(correct).strip().lower() in TRUE_VALUES
+        question['answers'] = [
+            {'answer_text': 'Verdadero', 'answer_weight': 100 if is_true else 0},
+            {'answer_text': 'Falso', 'answer_weight': 0 if is_true else 100},
+        ]
+    elif question_type == 'short_answer_question':
+        accepted = options or [part.strip() for part in str(correct).split('|') if part.strip()]
+        if not accepted:
+            raise ValueError("no se han indicado respuestas aceptadas")
+        question['answers'] = [{'answer_text': answer, 'answer_weight': 100} for answer in accepted]
+    elif question_type == 'numerical_question':
+        question['answers'] = [{
+            'numerical_answer_type': 'exact_answer',
+            'answer_exact': float(correct),
+            'answer_error_margin': float(fields.get('margin') or 0),
+            'answer_weight': 100,
+        }]
+
+    return question
+
+
+def _parse_records(records) -> tuple:
+    """Convierte cada registro en pregunta y acumula los errores por número de pregunta."""
+    questions, errors = [], []
+    for number, fields in records:
+        try:
+            questions.append(build_question(fields))
+        except (ValueError, TypeError) as e:
+            errors.append((number, str(e)))
+    return questions, errors
+
+
+def iter_csv_rows(file_path: str):
+    """
+    Recorre un CSV fila a fila con las cabeceras normalizadas en minúsculas y reúne
+    las columnas 'answer_1', 'answer_2'... en la lista 'answers'.
+    """
+    with open(file_path, 'r', encoding='utf-8-sig', newline='') as f:
+        for row in csv.DictReader(f):
+            row = {(key or '').strip().lower(): (value or '') for key, value in row.items()}
+            answer_keys = sorted((k for k in row if k.startswith('answer_')),
+                                 key=lambda k: int(k.split('_')[1]) if k.split('_')[1].isdigit() else 0)
+            row['answers'] = [row[k] for k in answer_keys]
+            yield row
+
+
+def load_from_csv(file_path: str) -> tuple:
+    """
+    CSV con cabecera: type, name, text, points, correct y tantas columnas
+    'answer_1', 'answer_2'... como opciones tenga la pregunta. Una columna opcional
+    'correct_index' indica la respuesta solo por posición (1, 2... o a, b...).
+    """
+    return _parse_records(enumerate(iter_csv_rows(file_path), start=1))
+
+
+def load_from_json(file_path: str) -> tuple:
+    """
+    JSON con una lista de preguntas, un objeto {"questions": [...]} o un quiz
+    exportado por esta aplicación (registro de 'quizzes.jsonl').
+    """
+    with open(file_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data.get('questions', [])
+    if not isinstance(data, list):
+        raise ValueError("El JSON debe contener una lista de preguntas.")
+    return _parse_records(enumerate(data, start=1))
+
+
+def _strip_namespaces(root):
+    for element in root.iter():
+        if isinstance(element.tag, str) and '}' in element.tag:
+            element.tag = element.tag.split('}', 1)[1]
+    return root
+
+
+def _qti_items(root) -> list:
+    """Extrae las preguntas de un documento QTI 1.2 (el formato que exporta Canvas)."""
+    records = []
+    for item in root.iter('item'):
+        metadata = {
+            (field.findtext('fieldlabel') or ''): (field.findtext('fieldentry') or '')
+            for field in item.iter('qtimetadatafield')
+        }
+        text = item.findtext('presentation/material/mattext') or ''
+        labels = [(label.get('ident'), label.findtext('.//mattext') or '') for label in item.iter('response_label')]
+        correct_idents = [
+            condition.findtext('conditionvar/varequal')
+            for condition in item.iter('respcondition')
+            if (condition.findtext('setvar') or '').strip() in ('100', '100.0')
+            and condition.find('conditionvar/varequal') is not None
+        ]
+
+        question_type = metadata.get('question_type')
+        if not question_type:
+            lid = item.find('.//response_lid')
+            if lid is not None:
+                question_type = 'multiple_answers' if lid.get('rcardinality') == 'Multiple' else 'multiple_choice'
+            else:
+                question_type = 'essay' if not correct_idents else 'short_answer'
+
+        fields = {
+            'type': question_type,
+            'name': item.get('title'),
+            'text': text,
+            'points': metadata.get('points_possible') or 1,
+        }
+        options = [label_text for _, label_text in labels]
+        idents = [ident for ident, _ in labels]
+        if question_type in ('true_false_question', 'true_false'):
+            correct_texts = [options[idents.index(i)] for i in correct_idents if i in idents]
+            fields['correct'] = 'true' if correct_texts and correct_texts[0].strip().lower() in ('true', 'verdadero') else 'false'
+        elif labels:
+            fields['answers'] = options
+            fields['correct_index'] = '|'.join(str(idents.index(i) + 1) for i in correct_idents if i in idents)
+        else:
+            fields['correct'] = '|'.join(c for c in correct_idents if c)
+        records.append(fields)
+    return records
+
+
+def load_from_qti(file_path: str) -> tuple:
+    """Carga preguntas de un archivo QTI (.xml) o de un paquete QTI comprimido (.zip)."""
+    documents = []
+    if file_path.lower().endswith('.zip'):
+        with zipfile.ZipFile(file_path) as archive:
+            for name in archive.namelist():
+                if name.lower().endswith('.xml'):
+                    content = archive.read(name)
+                    if re.search(rb'<(\w+:)?questestinterop', content):
+                        documents.append(ET.fromstring(content))
+    else:
+        documents.append(ET.parse(file_path).getroot())
+
+    records = []
+    for root in documents:
+        records.extend(_qti_items(_strip_namespaces(root)))
+    return _parse_records(enumerate(records, start=1))
+
+
+def load_questions(file_path: str) -> tuple:
+    """
+    Carga un banco de preguntas según la extensión del archivo (.csv, .json, .xml o .zip).
+    Devuelve (preguntas, errores), donde errores es una lista de (número de pregunta, mensaje).
+    """
+    lower = file_path.lower()
+    if lower.endswith('.csv'):
+        return load_from_csv(file_path)
+    if lower.endswith('.json'):
+        return load_from_json(file_path)
+    if lower.endswith('.xml') or lower.endswith('.zip'):
+        return load_from_qti(file_path)
+    raise ValueError("Formato no soportado. Usa un archivo .csv, .json, .xml (QTI) o .zip (QTI).")
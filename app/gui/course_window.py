@@ -1,50 +1,145 @@
 # app/gui/course_window.py
 
 import customtkinter as ctk
+from app.core.course_index import CourseIndex
+from app.utils import config_manager
 from app.utils.logger_config import logger # Importar el logger
 
-class CourseWindow(ctk.CTk):
-    def __init__(self, courses: list):
-        super().__init__()
-        # ... (código del constructor sin cambios)
-        self.title("Selección de Curso")
-        BUTTON_HEIGHT_WITH_PADDING = 38
-        BASE_HEIGHT = 120
-        MAX_HEIGHT = 600
-        MIN_HEIGHT = 200
-        num_courses = len(courses)
-        if num_courses == 0:
-            window_height = MIN_HEIGHT
-        else:
-            calculated_height = BASE_HEIGHT + (num_courses * BUTTON_HEIGHT_WITH_PADDING)
-            window_height = min(MAX_HEIGHT, calculated_height)
-        self.geometry(f"500x{window_height}")
-        self.selected_course_id = None
+# Milisegundos de espera tras la última pulsación antes de filtrar
+SEARCH_DEBOUNCE_MS = 150
+# Número máximo de botones de curso visibles a la vez
+MAX_VISIBLE_COURSES = 50
+# Milisegundos con el ratón sobre un curso antes de precargarlo
+PREFETCH_HOVER_MS = 250
+# Cursos recientes que se precargan al abrir el selector
+PREFETCH_RECENT_COURSES = 3
+
+
+class CourseWindow(ctk.CTkFrame):
+    """
+    Selector de cursos integrado en la ventana principal. Se construye una sola vez
+    y se vuelve a mostrar cada vez que el usuario quiere cambiar de curso.
+    La búsqueda usa un índice en memoria y solo se dibujan los cursos coincidentes.
+    'prefetch_callback' recibe el ID de los cursos que probablemente se van a abrir
+    (los recientes, el que está bajo el ratón y el primero de la búsqueda).
+    Los cursos recientes se guardan por perfil ('profile').
+    """
+
+    def __init__(self, parent, courses: list, select_callback, prefetch_callback=None,
+                 profile: str = config_manager.DEFAULT_PROFILE):
+        super().__init__(parent, fg_color="transparent")
+        self.select_callback = select_callback
+        self.prefetch_callback = prefetch_callback
+        self.profile = profile
+        self.index = CourseIndex(courses, config_manager.load_recent_courses(profile))
+        self.course_buttons = {}  # Botones creados bajo demanda y reutilizados entre búsquedas
+        self.visible_buttons = []
+        self.current_matches = []
+        self._search_job = None
+        self._hover_job = None
+
         self.grid_columnconfigure(0, weight=1)
-        self.grid_rowconfigure(1, weight=1)
+        self.grid_rowconfigure(2, weight=1)
         title_label = ctk.CTkLabel(self, text="Selecciona un curso para continuar", font=ctk.CTkFont(size=16, weight="bold"))
         title_label.grid(row=0, column=0, padx=20, pady=(20, 10))
-        scrollable_frame = ctk.CTkScrollableFrame(self, label_text="Cursos Activos")
-        scrollable_frame.grid(row=1, column=0, padx=20, pady=10, sticky="nsew")
-        scrollable_frame.grid_columnconfigure(0, weight=1)
-        if not courses:
-            no_courses_label = ctk.CTkLabel(scrollable_frame, text="No se encontraron cursos activos.")
-            no_courses_label.pack(pady=10)
-        else:
-            for i, course in enumerate(courses):
-                button = ctk.CTkButton(
-                    scrollable_frame,
-                    text=course['name'],
-                    command=lambda c=course: self.on_course_selected(c['id'], c['name']) # Pasamos también el nombre para el log
-                )
-                button.grid(row=i, column=0, padx=10, pady=(0, 8), sticky="ew")
+
+        self.search_var = ctk.StringVar()
+        self.search_var.trace_add("write", self.on_search_changed)
+        self.search_entry = ctk.CTkEntry(self, textvariable=self.search_var,
+                                         placeholder_text="Buscar por nombre, código o periodo...")
+        self.search_entry.grid(row=1, column=0, padx=20, pady=(0, 5), sticky="ew")
+        self.search_entry.bind("<Return>", self.on_search_submitted)
+
+        self.scrollable_frame = ctk.CTkScrollableFrame(self, label_text="Cursos Activos")
+        self.scrollable_frame.grid(row=2, column=0, padx=20, pady=10, sticky="nsew")
+        self.scrollable_frame.grid_columnconfigure(0, weight=1)
+        self.status_label = ctk.CTkLabel(self.scrollable_frame, text="")
+
+        self.render_matches(self.index.search(""))
+        for course_id in self.index.recent_ids[:PREFETCH_RECENT_COURSES]:
+            self.prefetch(course_id)
+
+    def on_search_changed(self, *args):
+        """Reprograma el filtrado para que solo se ejecute cuando el usuario deja de escribir."""
+        if self._search_job is not None:
+            self.after_cancel(self._search_job)
+        self._search_job = self.after(SEARCH_DEBOUNCE_MS, self.run_search)
+
+    def run_search(self):
+        self._search_job = None
+        self.render_matches(self.index.search(self.search_var.get()))
+        # El primer resultado es el que se abre con Enter.
+        if self.current_matches and self.search_var.get():
+            self.prefetch(self.current_matches[0].id)
+
+    def prefetch(self, course_id):
+        if self.prefetch_callback and course_id in self.index.courses:
+            self.prefetch_callback(course_id)
+
+    def on_course_hover(self, course_id):
+        self.on_course_leave()
+        self._hover_job = self.after(PREFETCH_HOVER_MS, lambda: self.prefetch(course_id))
+
+    def on_course_leave(self, event=None):
+        if self._hover_job is not None:
+            self.after_cancel(self._hover_job)
+            self._hover_job = None
+
+    def on_search_submitted(self, event=None):
+        """Al pulsar Enter se abre el primer curso de los resultados."""
+        if self._search_job is not None:
+            self.after_cancel(self._search_job)
+            self.run_search()
+        if self.current_matches:
+            course = self.current_matches[0]
+            self.on_course_selected(course.id, course.name)
+
+    def get_course_button(self, course):
+        button = self.course_buttons.get(course.id)
+        if button is None:
+            button = ctk.CTkButton(
+                self.scrollable_frame,
+                text=course.name,
+                command=lambda c=course: self.on_course_selected(c.id, c.name) # Pasamos también el nombre para el log
+            )
+            button.bind("<Enter>", lambda event, c=course: self.on_course_hover(c.id))
+            button.bind("<Leave>", self.on_course_leave)
+            button.bind("<FocusIn>", lambda event, c=course: self.prefetch(c.id))
+            self.course_buttons[course.id] = button
+        return button
+
+    def render_matches(self, matches: list):
+        """Muestra únicamente los cursos coincidentes, reutilizando los botones ya creados."""
+        self.current_matches = matches
+        for button in self.visible_buttons:
+            button.grid_forget()
+        self.status_label.grid_forget()
+        self.visible_buttons = []
+
+        if not self.index.courses:
+            self.status_label.configure(text="No se encontraron cursos activos.")
+            self.status_label.grid(row=0, column=0, pady=10)
+            return
+        if not matches:
+            self.status_label.configure(text="Ningún curso coincide con la búsqueda.")
+            self.status_label.grid(row=0, column=0, pady=10)
+            return
+
+        for i, course in enumerate(matches[:MAX_VISIBLE_COURSES]):
+            button = self.get_course_button(course)
+            button.grid(row=i, column=0, padx=10, pady=(0, 8), sticky="ew")
+            self.visible_buttons.append(button)
+
+        hidden = len(matches) - MAX_VISIBLE_COURSES
+        if hidden > 0:
+            self.status_label.configure(text=f"... y {hidden} cursos más. Afina la búsqueda.")
+            self.status_label.grid(row=MAX_VISIBLE_COURSES, column=0, pady=10)
 
     def on_course_selected(self, course_id: int, course_name: str):
         """Se llama cuando un usuario hace clic en un curso."""
         logger.info(f"Botón de curso pulsado. Selección: '{course_name}' (ID: {course_id})")
-        self.selected_course_id = course_id
-        self.destroy()
-
-    def get_selected_course(self):
-        self.mainloop()
-        return self.selected_course_id
\ No newline at end of file
+        self.on_course_leave()
+        config_manager.save_recent_courses(self.index.mark_recent(course_id), self.profile)
+        self.select_callback(course_id, course_name)
+        # Al volver al selector se parte de una búsqueda vacía con los recientes primero.
+        self.search_var.set("")
@@ -0,0 +1,170 @@
+# app/gui/grades_menu.py
+
+import customtkinter as ctk
+import os
+from tkinter import messagebox, filedialog
+from app.core import grade_import
+from app.core.jobs import COMPLETED, FAILED
+from app.utils.logger_config import logger
+
+
+class GradesMenu(ctk.CTkFrame):
+    GRADES_FILE_HINT = "CSV con columnas student_id (o sis_user_id), grade y comment"
+    NO_ASSIGNMENTS = "Carga primero las actividades"
+
+    def __init__(self, parent, client, course_id, back_callback, jobs):
+        super().__init__(parent)
+        self.client = client
+        self.course_id = course_id
+        self.back_callback = back_callback
+        self.jobs = jobs
+        self.assignments = {}  # Texto mostrado en el desplegable -> ID de la actividad
+        self.grades = []
+        self.grades_file_path = None
+
+        back_button = ctk.CTkButton(self, text="< Volver al Menú Principal", command=self.back_callback)
+        back_button.pack(anchor="nw", padx=10, pady=10)
+
+        # Pestañas para Calificaciones
+        self.tab_view = ctk.CTkTabview(self, anchor="w")
+        self.tab_view.pack(expand=True, fill="both", padx=10, pady=(0, 10))
+
+        self.tab_view.add("Calificar desde CSV")
+        self.setup_upload_tab()
+
+    def set_course(self, course_id):
+        """Asigna un nuevo curso y descarta las actividades y calificaciones del anterior."""
+        self.course_id = course_id
+        self.assignments = {}
+        self.assignment_combobox.configure(values=[])
+        self.assignment_combobox.set(self.NO_ASSIGNMENTS)
+        self.clear_grades_file()
+        self.upload_status_label.configure(text="")
+        self.results_textbox.delete("1.0", "end")
+
+    def apply_prefetched(self, data: dict):
+        """Rellena el desplegable con las actividades precargadas si aún no se han cargado."""
+        if 'assignments' in data and not self.assignments:
+            self.render_assignments(data['assignments'])
+
+    def setup_upload_tab(self):
+        upload_tab = self.tab_view.tab("Calificar desde CSV")
+        upload_tab.grid_columnconfigure(1, weight=1)
+        upload_tab.grid_rowconfigure(3, weight=1)
+
+        load_button = ctk.CTkButton(upload_tab, text="Cargar Actividades", command=self.handle_load_assignments)
+        load_button.grid(row=0, column=0, padx=20, pady=(20, 10), sticky="w")
+        self.assignment_combobox = ctk.CTkComboBox(upload_tab, values=[], state="readonly")
+        self.assignment_combobox.set(self.NO_ASSIGNMENTS)
+        self.assignment_combobox.grid(row=0, column=1, padx=20, pady=(20, 10), sticky="ew")
+
+        file_button = ctk.CTkButton(upload_tab, text="Seleccionar CSV", command=self.handle_select_grades_file)
+        file_button.grid(row=1, column=0, padx=20, pady=10, sticky="w")
+        self.grades_file_label = ctk.CTkLabel(upload_tab, text=self.GRADES_FILE_HINT, anchor="w")
+        self.grades_file_label.grid(row=1, column=1, padx=20, pady=10, sticky="ew")
+
+        self.upload_status_label = ctk.CTkLabel(upload_tab, text="", anchor="w")
+        self.upload_status_label.grid(row=2, column=0, columnspan=2, padx=20, pady=(10, 5), sticky="ew")
+
+        self.results_textbox = ctk.CTkTextbox(upload_tab, height=150)
+        self.results_textbox.grid(row=3, column=0, columnspan=2, padx=20, pady=5, sticky="nsew")
+
+        upload_button = ctk.CTkButton(upload_tab, text="Enviar Calificaciones", command=self.handle_upload_grades)
+        upload_button.grid(row=4, column=1, padx=20, pady=20, sticky="e")
+
+    def handle_load_assignments(self):
+        logger.info("Botón 'Cargar Actividades' (calificaciones) pulsado.")
+        course_id, client = self.course_id, self.client
+
+        def task(job):
+            assignments = client.get_assignments(course_id)
+            if assignments is None:
+                raise RuntimeError(client.error_message or "No se pudo cargar la lista de actividades.")
+            return assignments
+
+        def on_done(job):
+            if job.status == FAILED:
+                messagebox.showerror("Error", str(job.error))
+            elif job.status == COMPLETED and course_id == self.course_id and client is self.client:
+                self.render_assignments(job.result)
+
+        self.jobs.submit(f"Cargar actividades del curso {course_id}", task, on_done)
+
+    def render_assignments(self, assignments: list):
+        self.assignments = {f"{assignment.name} (ID: {assignment.id})": assignment.id for assignment in assignments}
+        values = list(self.assignments)
+        self.assignment_combobox.configure(values=values)
+        self.assignment_combobox.set(values[0] if values else "No hay actividades en este curso")
+
+    def handle_select_grades_file(self):
+        logger.info("Botón 'Seleccionar CSV' (calificaciones) pulsado.")
+        file_path = filedialog.askopenfilename(
+            title="Seleccionar archivo de calificaciones",
+            filetypes=[("Archivos CSV", "*.csv"), ("Todos los archivos", "*.*")]
+        )
+        if not file_path:
+            logger.warning("Selección de calificaciones cancelada por el usuario.")
+            return
+        try:
+            self.grades, errors = grade_import.load_grades(file_path)
+        except Exception as e:
+            logger.error(f"Error al leer el archivo de calificaciones {file_path}: {e}", exc_info=True)
+            messagebox.showerror("Error de Importación", f"No se pudo procesar el archivo.\n\nError: {e}")
+            self.clear_grades_file()
+            return
+
+        self.grades_file_path = file_path
+        self.grades_file_label.configure(
+            text=f"{os.path.basename(file_path)}: {len(self.grades)} calificaciones válidas, {len(errors)} filas con errores")
+        if errors:
+            details = "\n".join(f"• Fila {number}: {message}" for number, message in errors[:15])
+            messagebox.showwarning("Filas con Errores",
+                                   f"Se omitirán {len(errors)} filas con formato incorrecto:\n\n{details}")
+
+    def clear_grades_file(self):
+        self.grades = []
+        self.grades_file_path = None
+        self.grades_file_label.configure(text=self.GRADES_FILE_HINT)
+
+    def handle_upload_grades(self):
+        logger.info("Botón 'Enviar Calificaciones' pulsado.")
+        assignment_label = self.assignment_combobox.get()
+        assignment_id = self.assignments.get(assignment_label)
+        if not assignment_id:
+            messagebox.showwarning("Campo Requerido", "Selecciona la actividad que quieres calificar.")
+            return
+        if not self.grades:
+            messagebox.showwarning("Sin Calificaciones", "Selecciona primero un CSV con calificaciones válidas.")
+            return
+        if not messagebox.askyesno("Confirmar Calificaciones",
+                                   f"Se enviarán {len(self.grades)} calificaciones a '{assignment_label}'. ¿Continuar?"):
+            return
+
+        course_id, client = self.course_id, self.client
+        grades = list(self.grades)
+
+        def task(job):
+            job.report(0, len(grades))
+            result = client.update_grades(course_id, assignment_id, grades, job.report)
+            if result is None:
+                raise RuntimeError(client.error_message or "Ocurrió un error al enviar las calificaciones.")
+            return result
+
+        def on_done(job):
+            if job.status == FAILED:
+                messagebox.showerror("Error", str(job.error))
+                return
+            if job.status != COMPLETED or course_id != self.course_id or client is not self.client:
+                return
+            result = job.result
+            self.upload_status_label.configure(
+                text=f"Actividad {assignment_id}: {result['updated']} calificaciones aplicadas, "
+                     f"{len(result['errors'])} errores.")
+            self.results_textbox.delete("1.0", "end")
+            self.results_textbox.insert("1.0", "\n".join(f"• Estudiante {student}: {message}"
+                                                         for student, message in result['errors'])
+                                        or "Todas las calificaciones se aplicaron correctamente.")
+
+        self.jobs.submit(f"Calificar {len(grades)} estudiantes en '{assignment_label}'", task, on_done)
+        self.clear_grades_file()
+        self.upload_status_label.configure(text="Calificaciones enviadas al panel de tareas.")
@@ -0,0 +1,144 @@
+# app/gui/jobs_panel.py
+
+import customtkinter as ctk
+from tkinter import messagebox
+from app.core import outbox as outbox_states
+from app.core.jobs import JobManager, RUNNING, PENDING
+from app.utils.logger_config import logger
+
+# Intervalo de refresco del panel en milisegundos
+REFRESH_INTERVAL_MS = 250
+
+
+def format_seconds(seconds: float) -> str:
+    seconds = int(seconds)
+    return f"{seconds // 60}:{seconds % 60:02d}"
+
+
+class JobsPanel(ctk.CTkFrame):
+    """
+    Panel inferior de la ventana principal con los trabajos en curso: progreso,
+    velocidad, tiempo restante estimado y botón de cancelación. También muestra el
+    estado de la bandeja de salida y ejecuta en el hilo de Tk los callbacks de los
+    trabajos terminados.
+    """
+
+    def __init__(self, parent, jobs: JobManager, outbox):
+        super().__init__(parent)
+        self.jobs = jobs
+        self.outbox = outbox
+        self.rows = {}  # ID de trabajo -> widgets de su fila
+        self.linked_notice = ""  # Último envío que se enlazó con contenido existente en lugar de crearse
+
+        self.grid_columnconfigure(0, weight=1)
+        header = ctk.CTkFrame(self, fg_color="transparent")
+        header.grid(row=0, column=0, padx=10, pady=(5, 0), sticky="ew")
+        self.header_label = ctk.CTkLabel(header, text="Tareas: ninguna", font=ctk.CTkFont(weight="bold"))
+        self.header_label.pack(side="left")
+        clear_button = ctk.CTkButton(header, text="Limpiar terminadas", width=140, command=self.handle_clear_finished)
+        clear_button.pack(side="right")
+        self.failed_button = ctk.CTkButton(header, text="Envíos fallidos", width=130, fg_color="#B03A2E",
+                                           command=self.handle_failed_entries)
+        self.outbox_label = ctk.CTkLabel(header, text="")
+        self.outbox_label.pack(side="right", padx=10)
+
+        self.list_frame = ctk.CTkScrollableFrame(self, height=110)
+        self.list_frame.grid_columnconfigure(1, weight=1)
+
+        self.after(REFRESH_INTERVAL_MS, self.refresh)
+
+    def refresh(self):
+        # Los callbacks de los trabajos terminados se ejecutan aquí, en el hilo de Tk.
+        for job in self.jobs.pop_finished():
+            if job.on_done:
+                try:
+                    job.on_done(job)
+                except Exception as e:
+                    logger.error(f"Error al procesar el resultado del trabajo #{job.id}: {e}", exc_info=True)
+
+        jobs = self.jobs.jobs()
+        for job_id in [job_id for job_id in self.rows if job_id not in {job.id for job in jobs}]:
+            for widget in self.rows.pop(job_id).values():
+                widget.destroy()
+
+        for position, job in enumerate(jobs):
+            row = self.rows.get(job.id) or self.create_row(job)
+            for column, key in enumerate(("title", "progress", "details", "cancel")):
+                row[key].grid(row=position, column=column, padx=5, pady=2, sticky="ew")
+            self.update_row(row, job)
+
+        active = self.jobs.active_count()
+        self.header_label.configure(text=f"Tareas: {active} activas, {len(jobs) - active} terminadas" if jobs else "Tareas: ninguna")
+        if jobs:
+            self.list_frame.grid(row=1, column=0, padx=10, pady=5, sticky="ew")
+        else:
+            self.list_frame.grid_forget()
+
+        self.refresh_outbox()
+        self.after(REFRESH_INTERVAL_MS, self.refresh)
+
+    def refresh_outbox(self):
+        counts = self.outbox.counts()
+        pending = counts.get(outbox_states.PENDING, 0) + counts.get(outbox_states.SENDING, 0)
+        failed = counts.get(outbox_states.FAILED, 0)
+        for _, label, linked_id in self.outbox.pop_linked():
+            self.linked_notice = f"'{label}' ya existía: enlazada con el ID {linked_id}"
+        text = f"Bandeja de salida: {pending} pendientes" if pending else "Bandeja de salida al día"
+        self.outbox_label.configure(text=f"{text} · {self.linked_notice}" if self.linked_notice else text)
+        if failed:
+            self.failed_button.configure(text=f"Envíos fallidos ({failed})")
+            self.failed_button.pack(side="right", padx=(10, 0))
+        else:
+            self.failed_button.pack_forget()
+
+    def handle_failed_entries(self):
+        entries = self.outbox.failed_entries()
+        if not entries:
+            return
+        details = "\n".join(f"• {label} ({kind}): {(error or '')[:150]}" for _, kind, label, error in entries[:10])
+        answer = messagebox.askyesnocancel(
+            "Envíos Fallidos",
+            f"{len(entries)} operaciones no se pudieron enviar:\n\n{details}\n\n"
+            "Sí: reintentar todas · No: descartarlas · Cancelar: dejarlas como están")
+        if answer is True:
+            self.outbox.retry_failed()
+        elif answer is False:
+            self.outbox.discard_failed()
+
+    def create_row(self, job):
+        row = {
+            "title": ctk.CTkLabel(self.list_frame, text=job.title, anchor="w", width=220),
+            "progress": ctk.CTkProgressBar(self.list_frame),
+            "details": ctk.CTkLabel(self.list_frame, text="", anchor="w", width=260),
+            "cancel": ctk.CTkButton(self.list_frame, text="Cancelar", width=80,
+                                    command=lambda job_id=job.id: self.jobs.cancel(job_id)),
+        }
+        self.rows[job.id] = row
+        return row
+
+    def update_row(self, row, job):
+        if job.total:
+            row["progress"].set(min(job.done / job.total, 1))
+        else:
+            row["progress"].set(1 if job.finished else 0)
+
+        if job.status == RUNNING:
+            parts = [f"{job.done}/{job.total}" if job.total else f"{job.done}"]
+            if job.throughput:
+                parts.append(f"{job.throughput:.1f}/s")
+            if job.eta is not None:
+                parts.append(f"ETA {format_seconds(job.eta)}")
+            if job.message:
+                parts.append(job.message)
+            text = " · ".join(parts)
+            if job.cancel_requested:
+                text = "Cancelando... " + text
+        elif job.status == PENDING:
+            text = "Cancelando..." if job.cancel_requested else PENDING
+        else:
+            text = f"{job.status} en {format_seconds(job.elapsed)}"
+        row["details"].configure(text=text)
+        row["cancel"].configure(state="disabled" if job.finished or job.cancel_requested else "normal")
+
+    def handle_clear_finished(self):
+        self.jobs.clear_finished()
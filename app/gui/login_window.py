@@ -7,6 +7,7 @@ from app.utils.logger_config import logger # Importar el logger
 class LoginWindow(ctk.CTk):
     def __init__(self):
         super().__init__()
+        self.credentials = None  # Credenciales guardadas al pulsar 'Guardar y Continuar'
         # ... (código del constructor sin cambios)
         self.title("Configuración Inicial - Canvas Auto")
         self.geometry("400x250")
@@ -42,6 +43,7 @@ class LoginWindow(ctk.CTk):
 
         if config_manager.save_credentials(url, token):
             logger.info("Credenciales guardadas correctamente.")
+            self.credentials = {"canvas_url": url, "api_token": token}
             self.destroy()
         else:
             self.status_label.configure(text="Error: No se pudo guardar el archivo.")
@@ -1,10 +1,18 @@
 # app/gui/main_window.py
 
 import customtkinter as ctk
-from app.api.canvas_client import CanvasClient
+from tkinter import messagebox, filedialog
+from app.core import exporter
+from app.core.client_registry import ClientRegistry, ProfileSession
+from app.core.jobs import COMPLETED, FAILED
 from .quizzes_menu import QuizzesMenu
 from .rubrics_menu import RubricsMenu
 from .activities_menu import ActivitiesMenu
+from .grades_menu import GradesMenu
+from .course_window import CourseWindow
+from .jobs_panel import JobsPanel
+from .profile_dialog import ProfileDialog
+from app.utils import config_manager
 from app.utils.logger_config import logger
 
 # Importaciones necesarias para manejar imágenes
@@ -13,32 +21,154 @@ from PIL import Image
 
 
 class MainWindow(ctk.CTk):
-    def __init__(self, client: CanvasClient, course_id: int):
+    """
+    Ventana raíz única de la aplicación. El selector de cursos, el menú principal y
+    los submenús se construyen una sola vez; al cambiar de curso solo se vuelve a
+    asignar el ID del curso y se limpian los datos propios del curso anterior.
+    Cada perfil (instancia de Canvas) tiene su propia sesión en el registro de
+    clientes; cambiar a un perfil ya abierto solo vuelve a enlazar su sesión.
+    """
+
+    def __init__(self, registry: ClientRegistry, session: ProfileSession, validate_in_background: bool = False):
         super().__init__()
 
-        self.client = client
-        self.course_id = course_id
-        self.restart = False
+        self.registry = registry
+        self.session = session
+        self.client = session.client
+        self.outbox = session.outbox
+        self.course_id = None
+        self.course_name = ""
+        self.course_frame = None
+        self.course_frames = {}  # Perfil -> selector de cursos (se conserva al cambiar de perfil)
 
         # --- CONFIGURACIÓN DE LA VENTANA PRINCIPAL ---
-        course = self.client.get_course(self.course_id)
-        self.course_name = course.name if course else f"Curso ID: {self.course_id}"
-        self.title(f"Canvas Auto - {self.course_name}")
-        self.geometry("800x600")
+        self.title("Canvas Auto - Selección de Curso")
+        self.geometry("800x640")
         self.grid_columnconfigure(0, weight=1)
-        self.grid_rowconfigure(0, weight=1)
+        self.grid_rowconfigure(1, weight=1)
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+
+        # --- COLA DE TRABAJOS EN SEGUNDO PLANO (compartida por todos los menús y perfiles) ---
+        self.jobs = registry.jobs
+        self.jobs_panel = JobsPanel(self, self.jobs, self.outbox)
+        self.jobs_panel.grid(row=2, column=0, padx=10, pady=(0, 10), sticky="ew")
+
+        # --- BARRA DE PERFILES ---
+        self.setup_profile_bar()
 
         # --- CARGAR ICONOS (con mayor tamaño) ---
         self.load_icons()
 
-        # --- SUBMENÚS (INICIALMENTE OCULTOS) ---
-        self.quizzes_frame = QuizzesMenu(self, self.client, self.course_id, self.show_main_menu)
-        self.rubrics_frame = RubricsMenu(self, self.client, self.course_id, self.show_main_menu)
-        self.activities_frame = ActivitiesMenu(self, self.client, self.course_id, self.show_main_menu)
+        # --- SUBMENÚS (INICIALMENTE OCULTOS, SIN CURSO ASIGNADO) ---
+        self.quizzes_frame = QuizzesMenu(self, self.client, self.course_id, self.show_main_menu, self.jobs, self.outbox)
+        self.rubrics_frame = RubricsMenu(self, self.client, self.course_id, self.show_main_menu, self.jobs, self.outbox)
+        self.activities_frame = ActivitiesMenu(self, self.client, self.course_id, self.show_main_menu, self.jobs, self.outbox)
+        self.grades_frame = GradesMenu(self, self.client, self.course_id, self.show_main_menu, self.jobs)
 
-        # --- INICIAR EL MENÚ PRINCIPAL ---
+        # --- CONSTRUIR EL MENÚ PRINCIPAL ---
         self.setup_main_menu()
 
+        # --- AVISO DE CONEXIÓN (credenciales caducadas o Canvas inaccesible) ---
+        self.connection_label = ctk.CTkLabel(self, text="", text_color="#B03A2E")
+
+        # --- ENLAZAR LA SESIÓN DEL PERFIL Y MOSTRAR SU SELECTOR DE CURSOS ---
+        self.activate_session(session)
+        if validate_in_background:
+            self.start_background_validation()
+
+    # --- PERFILES ---
+    def setup_profile_bar(self):
+        profile_bar = ctk.CTkFrame(self, fg_color="transparent")
+        profile_bar.grid(row=0, column=0, padx=10, pady=(10, 0), sticky="ew")
+        profile_label = ctk.CTkLabel(profile_bar, text="Perfil:")
+        profile_label.pack(side="left", padx=(0, 10))
+        self.profile_combobox = ctk.CTkComboBox(profile_bar, values=config_manager.list_profiles(), state="readonly",
+                                                command=self.handle_switch_profile)
+        self.profile_combobox.pack(side="left")
+        new_profile_button = ctk.CTkButton(profile_bar, text="Nuevo Perfil", width=120, command=self.handle_new_profile)
+        new_profile_button.pack(side="left", padx=10)
+
+    def submenus(self) -> tuple:
+        return self.quizzes_frame, self.rubrics_frame, self.activities_frame, self.grades_frame
+
+    def activate_session(self, session: ProfileSession):
+        """
+        Enlaza la ventana con la sesión de un perfil: su cliente, su bandeja de salida,
+        su caché de precarga y su selector de cursos (que se crea solo la primera vez).
+        """
+        logger.info(f"Perfil activo: '{session.profile}'.")
+        self.session = session
+        self.client = session.client
+        self.outbox = session.outbox
+        self.course_cache = session.course_cache
+        self.prefetcher = session.prefetcher
+        self.jobs_panel.outbox = session.outbox
+        for menu in self.submenus():
+            menu.client = session.client
+            menu.set_course(None)
+        # Solo los menús que crean contenido usan la bandeja de salida
+        for menu in (self.quizzes_frame, self.rubrics_frame, self.activities_frame):
+            menu.outbox = session.outbox
+
+        if self.course_frame is not None:
+            self.course_frame.grid_forget()
+        if session.profile not in self.course_frames:
+            self.course_frames[session.profile] = CourseWindow(self, session.courses, self.select_course,
+                                                               session.prefetcher.request, session.profile)
+        self.course_frame = self.course_frames[session.profile]
+
+        self.course_id = None
+        self.course_name = ""
+        self.title("Canvas Auto - Selección de Curso")
+        self.profile_combobox.set(session.profile)
+        self.connection_label.grid_forget()
+        config_manager.set_active_profile(session.profile)
+        self.show_course_selector()
+
+    def handle_switch_profile(self, profile: str):
+        if profile == self.session.profile:
+            return
+        logger.info(f"Cambio al perfil '{profile}' solicitado.")
+        session = self.registry.get(profile)
+        if session:
+            self.activate_session(session)
+            return
+
+        # Primer uso del perfil en esta ejecución: se conecta en segundo plano.
+        self.profile_combobox.set(self.session.profile)
+
+        def task(job):
+            return self.registry.open(profile)
+
+        def on_done(job):
+            if job.status == FAILED:
+                # Un perfil con una URL o un token erróneos no se puede corregir: se ofrece eliminarlo.
+                if messagebox.askyesno("Error de Conexión",
+                                       f"No se pudo abrir el perfil '{profile}'.\n\n{job.error}\n\n"
+                                       "¿Eliminar este perfil? Podrás crearlo de nuevo con 'Nuevo Perfil'.",
+                                       icon="warning"):
+                    self.delete_profile(profile)
+            elif job.status == COMPLETED:
+                self.activate_session(job.result)
+
+        self.jobs.submit(f"Conectar con el perfil '{profile}'", task, on_done)
+
+    def delete_profile(self, profile: str):
+        if profile == self.session.profile or self.registry.get(profile):
+            return
+        logger.info(f"Eliminando el perfil '{profile}'.")
+        config_manager.delete_profile(profile)
+        self.profile_combobox.configure(values=config_manager.list_profiles())
+        self.profile_combobox.set(self.session.profile)
+
+    def handle_new_profile(self):
+        logger.info("Botón 'Nuevo Perfil' pulsado.")
+        ProfileDialog(self, config_manager.list_profiles(), self.on_profile_created)
+
+    def on_profile_created(self, profile: str):
+        self.profile_combobox.configure(values=config_manager.list_profiles())
+        self.handle_switch_profile(profile)
+
     def load_icons(self):
         """Carga las imágenes para los botones del menú con un tamaño mayor."""
         icon_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "assets", "icons")
@@ -48,6 +178,8 @@ class MainWindow(ctk.CTk):
         self.rubric_icon = self.get_ctk_image(os.path.join(icon_path, "rubric_icon.png"), size=(100, 100))
         self.activity_icon = self.get_ctk_image(os.path.join(icon_path, "activity_icon.png"), size=(100, 100))
         self.course_icon = self.get_ctk_image(os.path.join(icon_path, "course_icon.png"), size=(100, 100))
+        # Las calificaciones se aplican sobre actividades: se reutiliza su icono.
+        self.grades_icon = self.activity_icon
 
     def get_ctk_image(self, path, size=(64, 64)):
         """Carga una imagen y la convierte a CTkImage, manejando errores."""
@@ -109,17 +241,16 @@ class MainWindow(ctk.CTk):
     def setup_main_menu(self):
         """Crea la parrilla de tarjetas que se expanden para llenar la ventana."""
         self.main_menu_frame = ctk.CTkFrame(self, fg_color="transparent")
-        self.main_menu_frame.grid(row=0, column=0, sticky="nsew")
 
         # Configurar la parrilla para que las filas y columnas se expandan
         self.main_menu_frame.grid_rowconfigure(0, weight=0)  # Fila para el título (no se expande)
         self.main_menu_frame.grid_rowconfigure((1, 2), weight=1)  # Filas para las tarjetas (se expanden)
-        self.main_menu_frame.grid_columnconfigure((0, 1), weight=1)  # Columnas (se expanden)
+        self.main_menu_frame.grid_columnconfigure((0, 1, 2), weight=1)  # Columnas (se expanden)
 
-        # Título del curso (más grande)
-        title_label = ctk.CTkLabel(self.main_menu_frame, text=self.course_name,
-                                   font=ctk.CTkFont(size=28, weight="bold"))
-        title_label.grid(row=0, column=0, columnspan=2, pady=(40, 30))
+        # Título del curso (más grande). Se actualiza en cada cambio de curso.
+        self.course_title_label = ctk.CTkLabel(self.main_menu_frame, text=self.course_name,
+                                               font=ctk.CTkFont(size=28, weight="bold"))
+        self.course_title_label.grid(row=0, column=0, columnspan=3, pady=(40, 30))
 
         # --- Crear las tarjetas ---
         # sticky="nsew" hace que la tarjeta llene completamente su celda en la parrilla.
@@ -133,21 +264,45 @@ class MainWindow(ctk.CTk):
 
         activity_card = self.create_card_button(self.main_menu_frame, self.activity_icon, "Actividades",
                                                 self.show_activities_menu)
-        activity_card.grid(row=2, column=0, padx=20, pady=20, sticky="nsew")
+        activity_card.grid(row=1, column=2, padx=20, pady=20, sticky="nsew")
+
+        grades_card = self.create_card_button(self.main_menu_frame, self.grades_icon, "Calificaciones",
+                                              self.show_grades_menu)
+        grades_card.grid(row=2, column=0, padx=20, pady=20, sticky="nsew")
 
         course_card = self.create_card_button(self.main_menu_frame, self.course_icon, "Cambiar Curso",
                                               self.change_course)
         course_card.grid(row=2, column=1, padx=20, pady=20, sticky="nsew")
 
+        # --- Acciones sobre el curso completo (exportar / restaurar) ---
+        actions_frame = ctk.CTkFrame(self.main_menu_frame, fg_color="transparent")
+        actions_frame.grid(row=3, column=0, columnspan=3, padx=20, pady=(0, 20), sticky="ew")
+        self.export_button = ctk.CTkButton(actions_frame, text="Exportar Curso", command=self.handle_export_course)
+        self.export_button.pack(side="left", padx=(0, 10))
+        self.restore_button = ctk.CTkButton(actions_frame, text="Restaurar desde Archivo",
+                                            command=self.handle_restore_archive)
+        self.restore_button.pack(side="left")
+
     def show_frame(self, frame_to_show):
+        self.offer_prefetched(frame_to_show)
         self.main_menu_frame.grid_forget()
-        frame_to_show.grid(row=0, column=0, sticky="nsew", padx=10, pady=10)
+        frame_to_show.grid(row=1, column=0, sticky="nsew", padx=10, pady=10)
 
     def show_main_menu(self):
+        self.course_frame.grid_forget()
+        self.quizzes_frame.grid_forget()
+        self.rubrics_frame.grid_forget()
+        self.activities_frame.grid_forget()
+        self.grades_frame.grid_forget()
+        self.main_menu_frame.grid(row=1, column=0, sticky="nsew")
+
+    def show_course_selector(self):
+        self.main_menu_frame.grid_forget()
         self.quizzes_frame.grid_forget()
         self.rubrics_frame.grid_forget()
         self.activities_frame.grid_forget()
-        self.main_menu_frame.grid(row=0, column=0, sticky="nsew")
+        self.grades_frame.grid_forget()
+        self.course_frame.grid(row=1, column=0, sticky="nsew")
 
     def show_quizzes_menu(self):
         logger.info("Navegando al menú de quizzes.")
@@ -161,7 +316,140 @@ class MainWindow(ctk.CTk):
         logger.info("Navegando al menú de actividades.")
         self.show_frame(self.activities_frame)
 
+    def show_grades_menu(self):
+        logger.info("Navegando al menú de calificaciones.")
+        self.show_frame(self.grades_frame)
+
+    def select_course(self, course_id: int, course_name: str):
+        """
+        Asigna el curso seleccionado a la ventana y a todos los submenús sin
+        reconstruir widgets ni volver a pedir la lista de cursos.
+        """
+        logger.info(f"Cambiando al curso '{course_name}' (ID: {course_id}).")
+        self.course_id = course_id
+        self.course_name = course_name or f"Curso ID: {course_id}"
+        self.title(f"Canvas Auto - {self.course_name}")
+        self.course_title_label.configure(text=self.course_name)
+
+        for menu in self.submenus():
+            menu.set_course(course_id)
+        # Si el curso no estaba precargado se carga ahora, mientras el usuario elige un submenú.
+        self.prefetcher.request(course_id)
+
+        self.show_main_menu()
+
+    def offer_prefetched(self, menu):
+        """Entrega al submenú los datos precargados del curso actual, si los hay."""
+        data = self.course_cache.get(self.course_id)
+        if data:
+            menu.apply_prefetched(data)
+
+    # --- VALIDACIÓN DE CREDENCIALES ---
+    def start_background_validation(self):
+        """Comprueba el token sin bloquear la ventana y avisa si ya no es válido."""
+        session = self.session
+        client = session.client
+
+        def task(job):
+            # El error del cliente es propio del hilo del trabajo: se devuelve junto al usuario.
+            return client.validate_token(), client.error_message
+
+        def on_done(job):
+            if job.status != COMPLETED:
+                return
+            user, error = job.result
+            if user:
+                config_manager.save_validation(client.canvas_url, client.api_token,
+                                               user['id'], user['name'], session.profile)
+            if session is not self.session:
+                return
+            if user:
+                self.connection_label.grid_forget()
+            elif client.token_revoked:
+                self.connection_label.configure(
+                    text="El token de acceso ya no es válido. Genera uno nuevo en Canvas y vuelve a iniciar sesión.")
+                self.connection_label.grid(row=3, column=0, padx=10, pady=(0, 10), sticky="ew")
+                messagebox.showwarning("Credenciales no Válidas", error)
+            else:
+                self.connection_label.configure(
+                    text="No se pudo verificar la conexión con Canvas. Los envíos se reintentarán en segundo plano.")
+                self.connection_label.grid(row=3, column=0, padx=10, pady=(0, 10), sticky="ew")
+
+        self.jobs.submit("Verificar credenciales", task, on_done)
+
+    # --- EXPORTACIÓN Y RESTAURACIÓN ---
+    def handle_export_course(self):
+        logger.info("Botón 'Exportar Curso' pulsado.")
+        destination = filedialog.askdirectory(title="Seleccionar carpeta de destino")
+        if not destination:
+            logger.warning("Exportación cancelada por el usuario.")
+            return
+        compress = messagebox.askyesno("Compresión", "¿Deseas comprimir los archivos exportados (gzip)?")
+        course_id, client = self.course_id, self.client
+
+        def task(job):
+            progress = {}
+
+            def report(collection, count):
+                progress[collection] = count
+                job.report(sum(progress.values()), message=", ".join(f"{name}: {n}" for name, n in progress.items()))
+
+            return exporter.export_course(client, course_id, destination, compress, report)
+
+        def on_done(job):
+            if job.status == FAILED:
+                messagebox.showerror("Error", f"No se pudo exportar el curso.\n\nError: {job.error}")
+            elif job.status == COMPLETED:
+                manifest = job.result
+                lines = []
+                for name, entry in manifest["collections"].items():
+                    lines.append(f"• {name}: {entry['count']} registros" if "error" not in entry
+                                 else f"• {name}: ERROR ({entry['error']})")
+                messagebox.showinfo("Exportación Finalizada",
+                                    f"Curso exportado en:\n{manifest['path']}\n\n" + "\n".join(lines))
+
+        self.jobs.submit(f"Exportar curso {course_id}", task, on_done)
+
+    def handle_restore_archive(self):
+        logger.info("Botón 'Restaurar desde Archivo' pulsado.")
+        archive_dir = filedialog.askdirectory(title="Seleccionar carpeta de un curso exportado")
+        if not archive_dir:
+            logger.warning("Restauración cancelada por el usuario.")
+            return
+        if not messagebox.askyesno("Confirmar Restauración",
+                                   f"Se crearán en '{self.course_name}' todos los elementos del archivo. ¿Continuar?"):
+            return
+        course_id, client = self.course_id, self.client
+
+        def task(job):
+            return exporter.restore_archive(client, course_id, archive_dir,
+                                            lambda collection, count: job.report(count, message=collection))
+
+        def on_done(job):
+            if job.status == FAILED:
+                messagebox.showerror("Error", f"No se pudo restaurar el archivo.\n\nError: {job.error}")
+            elif job.status == COMPLETED:
+                lines = [f"• {name}: {r['created']} creados"
+                         + (f", {r['linked']} ya existentes (enlazados)" if r['linked'] else "")
+                         + f", {r['skipped']} omitidos, {len(r['errors'])} errores"
+                         for name, r in job.result.items()]
+                errors = [error for r in job.result.values() for error in r['errors']]
+                if errors:
+                    lines.append("\nPrimeros errores:")
+                    lines.extend(f"• {error[:200]}" for error in errors[:10])
+                messagebox.showinfo("Restauración Finalizada", "\n".join(lines))
+
+        self.jobs.submit(f"Restaurar archivo en el curso {course_id}", task, on_done)
+
     def change_course(self):
-        logger.info("Botón 'Seleccionar otro Curso' pulsado. Reiniciando flujo.")
-        self.restart = True
-        self.destroy()
\ No newline at end of file
+        logger.info("Botón 'Seleccionar otro Curso' pulsado. Mostrando el selector de cursos.")
+        self.show_course_selector()
+
+    def on_close(self):
+        active = self.jobs.active_count()
+        if active and not messagebox.askyesno("Tareas en Curso",
+                                              f"Hay {active} tareas sin terminar. ¿Cancelarlas y salir?"):
+            return
+        self.jobs.shutdown()
+        self.registry.close_all()
+        self.destroy()
@@ -0,0 +1,67 @@
+# app/gui/profile_dialog.py
+
+import customtkinter as ctk
+from app.utils import config_manager
+from app.utils.logger_config import logger
+
+
+class ProfileDialog(ctk.CTkToplevel):
+    """Ventana para dar de alta un perfil nuevo (otra instancia de Canvas)."""
+
+    def __init__(self, parent, existing_profiles: list, created_callback):
+        super().__init__(parent)
+        self.existing_profiles = existing_profiles
+        self.created_callback = created_callback
+
+        self.title("Nuevo Perfil - Canvas Auto")
+        self.geometry("420x260")
+        self.resizable(False, False)
+        self.transient(parent)
+        self.grid_columnconfigure(0, weight=1)
+        main_frame = ctk.CTkFrame(self)
+        main_frame.grid(row=0, column=0, padx=20, pady=20, sticky="nsew")
+        main_frame.grid_columnconfigure(1, weight=1)
+
+        name_label = ctk.CTkLabel(main_frame, text="Nombre del Perfil:")
+        name_label.grid(row=0, column=0, padx=10, pady=5, sticky="w")
+        self.name_entry = ctk.CTkEntry(main_frame, placeholder_text="Universidad, Pruebas...")
+        self.name_entry.grid(row=0, column=1, padx=10, pady=5, sticky="ew")
+        url_label = ctk.CTkLabel(main_frame, text="URL de Canvas:")
+        url_label.grid(row=1, column=0, padx=10, pady=5, sticky="w")
+        self.url_entry = ctk.CTkEntry(main_frame, placeholder_text="https://canvas.instructure.com")
+        self.url_entry.grid(row=1, column=1, padx=10, pady=5, sticky="ew")
+        token_label = ctk.CTkLabel(main_frame, text="Token de Acceso:")
+        token_label.grid(row=2, column=0, padx=10, pady=5, sticky="w")
+        self.token_entry = ctk.CTkEntry(main_frame, show="*")
+        self.token_entry.grid(row=2, column=1, padx=10, pady=5, sticky="ew")
+        save_button = ctk.CTkButton(main_frame, text="Guardar y Conectar", command=self.save_profile)
+        save_button.grid(row=3, column=0, columnspan=2, pady=(20, 0))
+        self.status_label = ctk.CTkLabel(main_frame, text="", text_color="red")
+        self.status_label.grid(row=4, column=0, columnspan=2, pady=(10, 0))
+
+        self.after(100, self.grab_set)
+
+    def save_profile(self):
+        logger.info("Botón 'Guardar y Conectar' (Nuevo Perfil) pulsado.")
+        name = self.name_entry.get().strip()
+        url = self.url_entry.get().strip()
+        token = self.token_entry.get().strip()
+
+        if not name or not url or not token:
+            self.status_label.configure(text="Error: Todos los campos son obligatorios.")
+            logger.warning("Intento de crear un perfil con campos vacíos.")
+            return
+        if name.casefold() in (profile.casefold() for profile in self.existing_profiles):
+            self.status_label.configure(text=f"Error: Ya existe un perfil llamado '{name}'.")
+            logger.warning(f"Intento de crear el perfil duplicado '{name}'.")
+            return
+
+        # El perfil pasa a ser el activo solo cuando la conexión se completa
+        if config_manager.save_credentials(url, token, profile=name, activate=False):
+            logger.info(f"Perfil '{name}' guardado correctamente.")
+            self.grab_release()
+            self.destroy()
+            self.created_callback(name)
+        else:
+            self.status_label.configure(text="Error: No se pudo guardar el archivo.")
+            logger.error(f"Fallo al guardar el perfil '{name}' en el archivo de configuración.")
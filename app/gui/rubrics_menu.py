@@ -4,16 +4,25 @@ import customtkinter as ctk
 from tkinter import messagebox, filedialog
 import json
 import csv
+from app.core.jobs import COMPLETED, FAILED
 from app.utils.logger_config import logger
 
 
 class RubricsMenu(ctk.CTkFrame):
-    def __init__(self, parent, client, course_id, back_callback):
+    # Opción del desplegable de asociación que crea la rúbrica del formulario 'Crear Rúbrica'
+    NEW_RUBRIC_OPTION = "Nueva rúbrica (la del formulario 'Crear Rúbrica')"
+
+    def __init__(self, parent, client, course_id, back_callback, jobs, outbox):
         super().__init__(parent)
         self.client = client
         self.course_id = course_id
         self.back_callback = back_callback
+        self.jobs = jobs
+        self.outbox = outbox
         self.imported_criteria = None
+        self.association_rubrics = {}  # Texto mostrado en el desplegable -> ID de la rúbrica
+        self.association_checkboxes = {}  # ID de la actividad -> casilla
+        self.association_names = {}  # ID de la actividad -> nombre
 
         back_button = ctk.CTkButton(self, text="< Volver al Menú Principal", command=self.back_callback)
         back_button.pack(anchor="nw", padx=10, pady=10)
@@ -23,9 +32,29 @@ class RubricsMenu(ctk.CTkFrame):
 
         self.tab_view.add("Crear Rúbrica")
         self.tab_view.add("Ver Rúbricas")
+        self.tab_view.add("Asociar a Actividades")
 
         self.setup_create_rubric_tab()
         self.setup_view_rubrics_tab()
+        self.setup_associate_tab()
+
+    def set_course(self, course_id):
+        """Asigna un nuevo curso y descarta la lista de rúbricas del curso anterior."""
+        self.course_id = course_id
+        for widget in self.rubric_list_frame.winfo_children():
+            widget.destroy()
+        self.render_association_rubrics([])
+        self.render_association_assignments([])
+        self.association_status_label.configure(text="")
+
+    def apply_prefetched(self, data: dict):
+        """Muestra las listas precargadas si el usuario aún no ha cargado las del curso."""
+        if 'rubrics' in data and not self.rubric_list_frame.winfo_children():
+            self.render_rubrics(data['rubrics'])
+        if 'rubrics' in data and not self.association_rubrics:
+            self.render_association_rubrics(data['rubrics'])
+        if 'assignments' in data and not self.association_checkboxes:
+            self.render_association_assignments(data['assignments'])
 
     def setup_create_rubric_tab(self):
         rubric_tab = self.tab_view.tab("Crear Rúbrica")
@@ -162,6 +191,29 @@ class RubricsMenu(ctk.CTkFrame):
 
     def handle_create_rubric(self):
         logger.info("Botón 'Crear Rúbrica' pulsado.")
+        form = self.read_rubric_form()
+        if form is None:
+            return
+        title, criteria_to_send, rubric_options = form
+
+        # La creación se guarda en la bandeja de salida y se envía en segundo plano.
+        payload = {'title': title, 'criteria_data': criteria_to_send, 'options': rubric_options}
+        if not self.outbox.enqueue('rubric', self.course_id, payload, title):
+            messagebox.showinfo("Ya en Cola", f"La rúbrica '{title}' ya está pendiente de envío.")
+            return
+        self.clear_rubric_form()
+
+    def clear_rubric_form(self):
+        self.rubric_title_entry.delete(0, "end")
+        self.rubric_criteria_textbox.delete("1.0", "end")
+        self.rubric_criteria_textbox.insert("1.0", self.instructions_text)
+        self.imported_criteria = None
+
+    def read_rubric_form(self):
+        """
+        Lee el formulario 'Crear Rúbrica' y devuelve (título, criterios, opciones), o None
+        (tras avisar al usuario) si el contenido no es válido.
+        """
         title = self.rubric_title_entry.get()
         rubric_options = {
             'free_form_criterion_comments': bool(self.free_form_comments_check.get()),
@@ -177,7 +229,7 @@ class RubricsMenu(ctk.CTkFrame):
             criteria_text = self.rubric_criteria_textbox.get("1.0", "end-1c").strip()
             if not title or not criteria_text or criteria_text == self.instructions_text.strip():
                 messagebox.showwarning("Campos Requeridos", "El título y los criterios son obligatorios.")
-                return
+                return None
 
             lines = criteria_text.strip().split('\n')
             for i, line in enumerate(lines):
@@ -189,7 +241,7 @@ class RubricsMenu(ctk.CTkFrame):
                 if first_comma == -1 or last_comma == -1 or first_comma == last_comma:
                     messagebox.showerror("Error de Formato",
                                          f"La línea {i + 1} no tiene el formato correcto (desc_corta,desc_larga,puntos).")
-                    return
+                    return None
 
                 desc = line[:first_comma].strip()
                 long_desc = line[first_comma + 1:last_comma].strip()
@@ -198,7 +250,7 @@ class RubricsMenu(ctk.CTkFrame):
                 if not points_str.isdigit():
                     messagebox.showerror("Error de Formato",
                                          f"Los puntos '{points_str}' en la línea {i + 1} no son un número válido.")
-                    return
+                    return None
 
                 criteria_to_send.append({
                     'description': desc,
@@ -206,16 +258,7 @@ class RubricsMenu(ctk.CTkFrame):
                     'points': int(points_str)
                 })
 
-        success = self.client.create_rubric(self.course_id, title, criteria_to_send, rubric_options)
-
-        if success:
-            messagebox.showinfo("Éxito", f"La rúbrica '{title}' ha sido creada correctamente.")
-            self.rubric_title_entry.delete(0, "end")
-            self.rubric_criteria_textbox.delete("1.0", "end")
-            self.rubric_criteria_textbox.insert("1.0", self.instructions_text)
-            self.imported_criteria = None
-        else:
-            messagebox.showerror("Error", self.client.error_message or "Ocurrió un error al crear la rúbrica.")
+        return title, criteria_to_send, rubric_options
 
     def setup_view_rubrics_tab(self):
         view_tab = self.tab_view.tab("Ver Rúbricas")
@@ -230,17 +273,182 @@ class RubricsMenu(ctk.CTkFrame):
 
     def handle_view_rubrics(self):
         logger.info("Botón 'Cargar Rúbricas' pulsado.")
+        course_id, client = self.course_id, self.client
+
+        def task(job):
+            rubrics = client.get_rubrics(course_id)
+            if rubrics is None:
+                raise RuntimeError(client.error_message or "No se pudo cargar la lista de rúbricas.")
+            return rubrics
+
+        def on_done(job):
+            if job.status == FAILED:
+                messagebox.showerror("Error", str(job.error))
+            elif job.status == COMPLETED and course_id == self.course_id and client is self.client:
+                self.render_rubrics(job.result)
+
+        self.jobs.submit(f"Cargar rúbricas del curso {course_id}", task, on_done)
+
+    def render_rubrics(self, rubrics: list):
         for widget in self.rubric_list_frame.winfo_children():
             widget.destroy()
-        rubrics = self.client.get_rubrics(self.course_id)
-        if rubrics is None:
-            messagebox.showerror("Error", self.client.error_message or "No se pudo cargar la lista de rúbricas.")
-            return
         if not rubrics:
             label = ctk.CTkLabel(self.rubric_list_frame, text="No se encontraron rúbricas en este curso.")
             label.pack(pady=10)
         else:
             for rubric in rubrics:
-                details = f"• {rubric['title']} (ID: {rubric['id']}) - Puntos: {rubric.get('points_possible', 'N/A')}"
+                details = f"• {rubric.title} (ID: {rubric.id}) - Puntos: {rubric.points_possible if rubric.points_possible is not None else 'N/A'}"
                 label = ctk.CTkLabel(self.rubric_list_frame, text=details)
-                label.pack(anchor="w", padx=10, pady=2)
\ No newline at end of file
+                label.pack(anchor="w", padx=10, pady=2)
+
+    # --- ASOCIAR UNA RÚBRICA A VARIAS ACTIVIDADES ---
+    def setup_associate_tab(self):
+        associate_tab = self.tab_view.tab("Asociar a Actividades")
+        associate_tab.grid_columnconfigure(1, weight=1)
+        associate_tab.grid_rowconfigure(3, weight=1)
+
+        load_button = ctk.CTkButton(associate_tab, text="Cargar Rúbricas y Actividades",
+                                    command=self.handle_load_association_data)
+        load_button.grid(row=0, column=0, padx=20, pady=(20, 10), sticky="w")
+        self.association_status_label = ctk.CTkLabel(associate_tab, text="", anchor="w")
+        self.association_status_label.grid(row=0, column=1, padx=20, pady=(20, 10), sticky="ew")
+
+        rubric_label = ctk.CTkLabel(associate_tab, text="Rúbrica:")
+        rubric_label.grid(row=1, column=0, padx=20, pady=5, sticky="w")
+        self.association_rubric_combobox = ctk.CTkComboBox(associate_tab, values=[], state="readonly")
+        self.association_rubric_combobox.grid(row=1, column=1, padx=20, pady=5, sticky="ew")
+
+        options_frame = ctk.CTkFrame(associate_tab, fg_color="transparent")
+        options_frame.grid(row=2, column=0, columnspan=2, padx=20, pady=5, sticky="w")
+        self.use_for_grading_check = ctk.CTkCheckBox(options_frame, text="Usar para calificar")
+        self.use_for_grading_check.select()
+        self.use_for_grading_check.pack(side="left", padx=(0, 15))
+        self.association_hide_score_check = ctk.CTkCheckBox(options_frame, text="Ocultar puntuación total")
+        self.association_hide_score_check.pack(side="left", padx=(0, 15))
+        select_all_button = ctk.CTkButton(options_frame, text="Marcar Todas", width=110,
+                                          command=lambda: self.toggle_association_assignments(True))
+        select_all_button.pack(side="left", padx=(0, 10))
+        select_none_button = ctk.CTkButton(options_frame, text="Desmarcar Todas", width=110,
+                                           command=lambda: self.toggle_association_assignments(False))
+        select_none_button.pack(side="left")
+
+        self.association_assignments_frame = ctk.CTkScrollableFrame(associate_tab, label_text="Actividades del Curso")
+        self.association_assignments_frame.grid(row=3, column=0, columnspan=2, padx=20, pady=5, sticky="nsew")
+
+        associate_button = ctk.CTkButton(associate_tab, text="Asociar Rúbrica", command=self.handle_associate_rubric)
+        associate_button.grid(row=4, column=1, padx=20, pady=20, sticky="e")
+        self.render_association_rubrics([])
+
+    def handle_load_association_data(self):
+        logger.info("Botón 'Cargar Rúbricas y Actividades' pulsado.")
+        course_id, client = self.course_id, self.client
+
+        def task(job):
+            rubrics = client.get_rubrics(course_id)
+            if rubrics is None:
+                raise RuntimeError(client.error_message or "No se pudo cargar la lista de rúbricas.")
+            assignments = client.get_assignments(course_id)
+            if assignments is None:
+                raise RuntimeError(client.error_message or "No se pudo cargar la lista de actividades.")
+            return rubrics, assignments
+
+        def on_done(job):
+            if job.status == FAILED:
+                messagebox.showerror("Error", str(job.error))
+            elif job.status == COMPLETED and course_id == self.course_id and client is self.client:
+                rubrics, assignments = job.result
+                self.render_association_rubrics(rubrics)
+                self.render_association_assignments(assignments)
+                self.association_status_label.configure(
+                    text=f"{len(rubrics)} rúbricas y {len(assignments)} actividades cargadas.")
+
+        self.jobs.submit(f"Cargar rúbricas y actividades del curso {course_id}", task, on_done)
+
+    def render_association_rubrics(self, rubrics: list):
+        self.association_rubrics = {f"{rubric.title} (ID: {rubric.id})": rubric.id for rubric in rubrics}
+        values = list(self.association_rubrics)
+        self.association_rubric_combobox.configure(values=values + [self.NEW_RUBRIC_OPTION])
+        self.association_rubric_combobox.set(values[0] if values else self.NEW_RUBRIC_OPTION)
+
+    def render_association_assignments(self, assignments: list):
+        for widget in self.association_assignments_frame.winfo_children():
+            widget.destroy()
+        self.association_checkboxes = {}
+        self.association_names = {}
+        for assignment in assignments:
+            points = assignment.points_possible if assignment.points_possible is not None else 'N/A'
+            checkbox = ctk.CTkCheckBox(self.association_assignments_frame, text=f"{assignment.name} · {points} pts")
+            checkbox.pack(anchor="w", padx=10, pady=2)
+            self.association_checkboxes[assignment.id] = checkbox
+            self.association_names[assignment.id] = assignment.name
+
+    def toggle_association_assignments(self, selected: bool):
+        for checkbox in self.association_checkboxes.values():
+            if selected:
+                checkbox.select()
+            else:
+                checkbox.deselect()
+
+    def handle_associate_rubric(self):
+        logger.info("Botón 'Asociar Rúbrica' pulsado.")
+        rubric_label = self.association_rubric_combobox.get()
+        rubric_id = self.association_rubrics.get(rubric_label)
+        new_rubric = None
+        if rubric_label == self.NEW_RUBRIC_OPTION:
+            # La rúbrica nueva se crea dentro del trabajo (sin pasar por la bandeja de salida)
+            # porque hace falta su ID para asociarla.
+            new_rubric = self.read_rubric_form()
+            if new_rubric is None:
+                return
+            rubric_label = new_rubric[0]
+        elif not rubric_id:
+            messagebox.showwarning("Campo Requerido", "Selecciona la rúbrica que quieres asociar.")
+            return
+        assignment_ids = [assignment_id for assignment_id, checkbox in self.association_checkboxes.items()
+                          if checkbox.get()]
+        if not assignment_ids:
+            messagebox.showwarning("Sin Actividades", "Marca al menos una actividad.")
+            return
+        if not messagebox.askyesno("Confirmar Asociación",
+                                   f"Se asociará '{rubric_label}' a {len(assignment_ids)} actividades. "
+                                   "Si alguna ya tiene rúbrica, se sustituirá. ¿Continuar?"):
+            return
+
+        course_id, client = self.course_id, self.client
+        names = dict(self.association_names)
+        options = {
+            'use_for_grading': bool(self.use_for_grading_check.get()),
+            'hide_score_total': bool(self.association_hide_score_check.get())
+        }
+
+        def task(job):
+            job.report(0, len(assignment_ids))
+            target_id = rubric_id
+            if new_rubric:
+                target_id = client.create_rubric_with_id(course_id, *new_rubric)
+                if target_id is None:
+                    raise RuntimeError(client.error_message or "No se pudo crear la rúbrica.")
+            result = client.associate_rubric(course_id, target_id, assignment_ids, options, job.report)
+            if result is None:
+                raise RuntimeError(client.error_message or "Ocurrió un error al asociar la rúbrica.")
+            return result
+
+        def on_done(job):
+            if job.status == FAILED:
+                messagebox.showerror("Error", str(job.error))
+                return
+            if job.status != COMPLETED:
+                return
+            result = job.result
+            if course_id == self.course_id and client is self.client:
+                self.association_status_label.configure(
+                    text=f"Rúbrica {result['rubric_id']} asociada a {result['associated']} actividades, {len(result['errors'])} errores.")
+            if result['errors']:
+                details = "\n".join(f"• {names.get(assignment_id, assignment_id)}: {message[:200]}"
+                                    for assignment_id, message in result['errors'][:10])
+                messagebox.showerror("Asociaciones Fallidas",
+                                     f"No se pudo asociar la rúbrica a {len(result['errors'])} actividades:\n\n{details}")
+
+        self.jobs.submit(f"Asociar '{rubric_label}' a {len(assignment_ids)} actividades", task, on_done)
+        if new_rubric:
+            self.clear_rubric_form()
@@ -1,39 +1,204 @@
 # app/utils/config_manager.py
 
+import hashlib
 import json
 import os
+import tempfile
+import threading
+import time
 
 # Definimos una ruta consistente para el archivo de configuración
 CONFIG_FILE = "config.json"
+# Archivo con los IDs de los cursos abiertos recientemente (más reciente primero)
+RECENT_COURSES_FILE = "recent_courses.json"
 
 
-def save_credentials(url: str, token: str):
-    """Guarda la URL y el token en el archivo de configuración."""
-    credentials = {
-        "canvas_url": url,
-        "api_token": token
-    }
+# Perfil al que se migran las credenciales de versiones anteriores (un solo par URL/token)
+DEFAULT_PROFILE = "Predeterminado"
+
+# Configuración cargada en memoria: el archivo solo se lee la primera vez
+_config_cache = None
+# Serializa las escrituras (leer, modificar y reemplazar el archivo): la validación en
+# segundo plano, el cambio de perfil y la interfaz pueden guardar a la vez.
+_config_lock = threading.RLock()
+
+
+def _migrate(config: dict) -> dict:
+    """Convierte el formato antiguo ('canvas_url'/'api_token' en la raíz) en perfiles con nombre."""
+    if "profiles" in config or "canvas_url" not in config:
+        config.setdefault("profiles", {})
+        return config
+    profile = {key: config[key] for key in ("canvas_url", "api_token", "last_validation") if key in config}
+    return {"profiles": {DEFAULT_PROFILE: profile}, "active_profile": DEFAULT_PROFILE}
+
+
+def _load_config() -> dict:
+    """Devuelve la configuración en memoria, leyendo el archivo solo la primera vez."""
+    global _config_cache
+    if _config_cache is None:
+        _config_cache = {"profiles": {}}
+        if os.path.exists(CONFIG_FILE):
+            try:
+                with open(CONFIG_FILE, 'r') as f:
+                    data = json.load(f)
+                    _config_cache = _migrate(data if isinstance(data, dict) else {})
+            except (IOError, json.JSONDecodeError) as e:
+                print(f"Error al leer o procesar el archivo de configuración: {e}")
+    return _config_cache
+
+
+def _write_config(config: dict) -> bool:
+    """
+    Escribe la configuración de forma atómica: primero en un archivo temporal único de
+    la misma carpeta y después se reemplaza el original, de modo que un cierre inesperado
+    nunca lo deja a medias. Debe llamarse con '_config_lock' tomado.
+    """
+    global _config_cache
+    tmp_path = None
     try:
-        with open(CONFIG_FILE, 'w') as f:
-            json.dump(credentials, f, indent=4)
-        return True
-    except IOError as e:
+        fd, tmp_path = tempfile.mkstemp(prefix=f".{CONFIG_FILE}.", suffix=".tmp",
+                                        dir=os.path.dirname(os.path.abspath(CONFIG_FILE)))
+        with os.fdopen(fd, 'w') as f:
+            json.dump(config, f, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, CONFIG_FILE)
+    except (IOError, OSError) as e:
         print(f"Error al guardar el archivo de configuración: {e}")
+        if tmp_path and os.path.exists(tmp_path):
+            os.remove(tmp_path)
         return False
+    _config_cache = config
+    return True
+
+
+def _updated_profile(profile: str, **changes) -> dict:
+    """Copia de la configuración con los cambios aplicados a un perfil. Requiere '_config_lock'."""
+    config = dict(_load_config())
+    config["profiles"] = dict(config.get("profiles", {}))
+    config["profiles"][profile] = {**config["profiles"].get(profile, {}), **changes}
+    return config
+
+
+def token_fingerprint(token: str) -> str:
+    """Huella del token para reconocerlo sin volver a guardarlo en claro."""
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()[:16]
+
+
+# --- Perfiles (una instancia de Canvas con sus credenciales cada uno) ---
+def list_profiles() -> list:
+    return list(_load_config().get("profiles", {}))
+
+
+def get_active_profile():
+    """Perfil usado la última vez, o el primero que exista; None si no hay ninguno."""
+    config = _load_config()
+    active = config.get("active_profile")
+    if active in config.get("profiles", {}):
+        return active
+    profiles = list_profiles()
+    return profiles[0] if profiles else None
 
 
-def load_credentials():
-    """Carga la URL y el token desde el archivo de configuración."""
-    if not os.path.exists(CONFIG_FILE):
-        return None
+def set_active_profile(profile: str):
+    with _config_lock:
+        config = dict(_load_config())
+        if profile not in config.get("profiles", {}) or config.get("active_profile") == profile:
+            return True
+        config["active_profile"] = profile
+        return _write_config(config)
 
+
+def delete_profile(profile: str):
+    with _config_lock:
+        config = dict(_load_config())
+        config["profiles"] = {name: data for name, data in config.get("profiles", {}).items() if name != profile}
+        if config.get("active_profile") == profile:
+            config.pop("active_profile")
+        return _write_config(config)
+
+
+def save_credentials(url: str, token: str, profile: str | None = None, activate: bool = True):
+    """
+    Guarda la URL y el token de un perfil (por defecto, el activo) y, salvo que se indique
+    lo contrario, lo deja como activo. Si cambian las credenciales se descarta la
+    validación guardada del perfil.
+    """
+    with _config_lock:
+        profile = profile or get_active_profile() or DEFAULT_PROFILE
+        config = _updated_profile(profile, canvas_url=url, api_token=token)
+        config["profiles"][profile].pop("last_validation", None)
+        if activate or not config.get("active_profile"):
+            config["active_profile"] = profile
+        return _write_config(config)
+
+
+def load_credentials(profile: str | None = None):
+    """Carga la URL y el token de un perfil (por defecto, el activo)."""
+    profile = profile or get_active_profile()
+    data = _load_config().get("profiles", {}).get(profile) or {}
+    if "canvas_url" in data and "api_token" in data:
+        return {"canvas_url": data["canvas_url"], "api_token": data["api_token"]}
+    return None
+
+
+def save_validation(url: str, token: str, user_id, user_name: str, profile: str | None = None):
+    """Guarda la última validación correcta de las credenciales (usuario, host, huella del token y fecha)."""
+    validation = {
+        "host": url.rstrip('/'),
+        "token_fingerprint": token_fingerprint(token),
+        "user_id": user_id,
+        "user_name": user_name,
+        "validated_at": time.time()
+    }
+    with _config_lock:
+        return _write_config(_updated_profile(profile or get_active_profile() or DEFAULT_PROFILE,
+                                              last_validation=validation))
+
+
+def load_validation(url: str, token: str, profile: str | None = None):
+    """
+    Devuelve la última validación correcta si corresponde a la misma URL y al mismo
+    token, o None si nunca se validaron estas credenciales.
+    """
+    data = _load_config().get("profiles", {}).get(profile or get_active_profile()) or {}
+    validation = data.get("last_validation")
+    if (isinstance(validation, dict) and validation.get("host") == url.rstrip('/')
+            and validation.get("token_fingerprint") == token_fingerprint(token)):
+        return validation
+    return None
+
+
+def _load_recent_file() -> dict:
+    if not os.path.exists(RECENT_COURSES_FILE):
+        return {}
     try:
-        with open(CONFIG_FILE, 'r') as f:
-            credentials = json.load(f)
-            if "canvas_url" in credentials and "api_token" in credentials:
-                return credentials
-            else:
-                return None
+        with open(RECENT_COURSES_FILE, 'r') as f:
+            recent = json.load(f)
     except (IOError, json.JSONDecodeError) as e:
-        print(f"Error al leer o procesar el archivo de configuración: {e}")
-        return None
\ No newline at end of file
+        print(f"Error al leer el archivo de cursos recientes: {e}")
+        return {}
+    # Formato antiguo: una sola lista, que pertenece al perfil predeterminado.
+    if isinstance(recent, list):
+        return {DEFAULT_PROFILE: recent}
+    return recent if isinstance(recent, dict) else {}
+
+
+def load_recent_courses(profile: str = DEFAULT_PROFILE) -> list:
+    """Carga la lista de IDs de cursos recientes de un perfil. Devuelve una lista vacía si no existe."""
+    recent = _load_recent_file().get(profile)
+    return recent if isinstance(recent, list) else []
+
+
+def save_recent_courses(course_ids: list, profile: str = DEFAULT_PROFILE):
+    """Guarda la lista de IDs de cursos recientes de un perfil."""
+    with _config_lock:
+        recent = _load_recent_file()
+        recent[profile] = course_ids
+        try:
+            with open(RECENT_COURSES_FILE, 'w') as f:
+                json.dump(recent, f)
+            return True
+        except IOError as e:
+            print(f"Error al guardar el archivo de cursos recientes: {e}")
+            return False
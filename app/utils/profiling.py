@@ -0,0 +1,308 @@
+# app/utils/profiling.py
+
+import atexit
+import cProfile
+import functools
+import inspect
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+from app.utils.logger_config import logger
+
+# Variable de entorno y argumento de línea de comandos que activan el modo de perfilado
+PROFILE_ENV_VAR = "CANVAS_AUTO_PROFILE"
+PROFILE_FLAG = "--profiling"
+REPORT_DIR = "logs"
+
+# Prefijos de los métodos de la interfaz que se instrumentan
+GUI_METHOD_PREFIXES = ("handle_", "render_", "select_course", "on_course_selected")
+
+# Ventanas modales de Tkinter: el tiempo que el usuario pasa leyéndolas no es trabajo de Tk
+DIALOG_FUNCTIONS = {
+    "messagebox": ("showinfo", "showwarning", "showerror", "askyesno", "askokcancel", "askquestion",
+                   "askyesnocancel", "askretrycancel"),
+    "filedialog": ("askopenfilename", "askopenfilenames", "asksaveasfilename", "askdirectory"),
+}
+
+# Categorías del informe
+NETWORK = "red"
+JSON = "json"
+TK = "tk"
+CLIENT = "cliente"
+DIALOG = "diálogo"
+
+_profiler = None
+
+
+def is_enabled() -> bool:
+    return os.environ.get(PROFILE_ENV_VAR, "").lower() in ("1", "true", "yes") or PROFILE_FLAG in sys.argv
+
+
+class _Stat:
+    __slots__ = ("calls", "wall", "cpu", "exclusive", "max_wall")
+
+    def __init__(self):
+        self.calls = 0
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.exclusive = 0.0
+        self.max_wall = 0.0
+
+
+class SessionProfiler:
+    """
+    Recoge, durante toda la sesión, el tiempo de pared y de CPU de cada método
+    instrumentado. El tiempo de cada llamada se reparte entre su categoría y las
+    llamadas anidadas en el mismo hilo (p. ej. un manejador de Tk que espera a la red),
+    de modo que el informe separa espera de red, decodificación JSON, trabajo de Tk y
+    tiempo con un diálogo modal abierto (espera del usuario).
+    """
+
+    def __init__(self):
+        self.stats = {}
+        self.categories = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.started_at = datetime.now()
+        self.profile = cProfile.Profile()
+        # Estadísticas de cProfile acumuladas de los hilos de trabajo (trabajos, precarga, bandeja de salida)
+        self.thread_stats = None
+        self.thread_runs = 0
+
+    def start(self):
+        tracemalloc.start(25)
+        # El perfilador principal cubre el hilo de Tk; los demás hilos usan 'profile_thread'.
+        self.profile.enable()
+        logger.info("Modo de perfilado activado.")
+
+    def profile_thread(self, func):
+        """
+        Ejecuta 'func' fuera del hilo de Tk bajo su propio cProfile.Profile y acumula el
+        resultado al terminar. En el hilo de Tk, o si el hilo ya se está perfilando, se
+        llama sin más. Si el intérprete no admite otro perfilador activo (Python 3.12+,
+        donde el principal ya observa todos los hilos) también se llama sin más.
+        """
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if threading.current_thread() is threading.main_thread() or getattr(self._local, "profiling", False):
+                return func(*args, **kwargs)
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:
+                return func(*args, **kwargs)
+            self._local.profiling = True
+            try:
+                return func(*args, **kwargs)
+            finally:
+                profile.disable()
+                self._local.profiling = False
+                self._add_thread_profile(profile)
+        wrapper.__profiled__ = True
+        return wrapper
+
+    def _add_thread_profile(self, profile):
+        with self._lock:
+            try:
+                if self.thread_stats is None:
+                    self.thread_stats = pstats.Stats(profile)
+                else:
+                    self.thread_stats.add(profile)
+            except TypeError:  # Perfil vacío: no se llegó a ejecutar nada medible
+                return
+            self.thread_runs += 1
+
+    def _enter(self) -> tuple:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        stack.append(0.0)  # Tiempo consumido por llamadas anidadas instrumentadas
+        return stack, time.perf_counter(), time.thread_time()
+
+    @staticmethod
+    def _exit(stack: list, wall_start: float, cpu_start: float) -> tuple:
+        """Cierra una medición y devuelve (pared, CPU, exclusivo)."""
+        wall = time.perf_counter() - wall_start
+        cpu = time.thread_time() - cpu_start
+        nested = stack.pop()
+        if stack:
+            stack[-1] += wall
+        return wall, cpu, wall - nested
+
+    def wrap(self, category: str, name: str, func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            measurement = self._enter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._record(category, name, *self._exit(*measurement))
+        wrapper.__profiled__ = True
+        return wrapper
+
+    def wrap_generator(self, category: str, name: str, func):
+        """
+        Instrumenta una función generadora. Crear el generador no hace nada: se mide cada
+        reanudación (donde ocurren las peticiones) y se registra el total al terminar.
+        """
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            generator = func(*args, **kwargs)
+            wall = cpu = exclusive = 0.0
+            try:
+                while True:
+                    measurement = self._enter()
+                    try:
+                        item = next(generator)
+                    except StopIteration:
+                        return
+                    finally:
+                        step_wall, step_cpu, step_exclusive = self._exit(*measurement)
+                        wall += step_wall
+                        cpu += step_cpu
+                        exclusive += step_exclusive
+                    yield item
+            finally:
+                generator.close()
+                self._record(category, name, wall, cpu, exclusive)
+        wrapper.__profiled__ = True
+        return wrapper
+
+    def _record(self, category, name, wall, cpu, exclusive):
+        with self._lock:
+            for key, table in ((name, self.stats), (category, self.categories)):
+                stat = table.get(key)
+                if stat is None:
+                    stat = table[key] = _Stat()
+                stat.calls += 1
+                stat.wall += wall
+                stat.cpu += cpu
+                stat.exclusive += exclusive
+                stat.max_wall = max(stat.max_wall, wall)
+
+    def patch(self, owner, attribute: str, category: str, name: str | None = None):
+        func = getattr(owner, attribute, None)
+        if func is None or getattr(func, "__profiled__", False):
+            return
+        wrap = self.wrap_generator if inspect.isgeneratorfunction(func) else self.wrap
+        setattr(owner, attribute, wrap(category, name or f"{getattr(owner, '__name__', owner)}.{attribute}", func))
+
+    def patch_thread(self, owner, attribute: str):
+        """Hace que 'owner.attribute', que se ejecuta en un hilo de trabajo, se perfile con cProfile."""
+        func = getattr(owner, attribute, None)
+        if func is None or getattr(func, "__profiled__", False):
+            return
+        setattr(owner, attribute, self.profile_thread(func))
+
+    def write_report(self) -> str:
+        self.profile.disable()
+        lines = [f"Informe de perfilado de Canvas Auto - sesión iniciada {self.started_at:%Y-%m-%d %H:%M:%S}", ""]
+
+        lines.append("== Tiempo por categoría (exclusivo = sin contar llamadas anidadas instrumentadas) ==")
+        lines.append(f"El tiempo de '{TK}' excluye el de '{DIALOG}' (ventanas modales a la espera del usuario).")
+        lines.append(f"{'categoría':<12}{'llamadas':>10}{'pared (s)':>12}{'exclusivo (s)':>15}{'CPU (s)':>10}")
+        for category, stat in sorted(self.categories.items(), key=lambda item: -item[1].exclusive):
+            lines.append(f"{category:<12}{stat.calls:>10}{stat.wall:>12.3f}{stat.exclusive:>15.3f}{stat.cpu:>10.3f}")
+
+        lines += ["", "== Métodos instrumentados (ordenados por tiempo de pared) =="]
+        lines.append(f"{'método':<52}{'llamadas':>9}{'pared (s)':>11}{'excl. (s)':>11}{'CPU (s)':>9}{'máx (s)':>9}")
+        for name, stat in sorted(self.stats.items(), key=lambda item: -item[1].wall):
+            lines.append(f"{name[:51]:<52}{stat.calls:>9}{stat.wall:>11.3f}{stat.exclusive:>11.3f}"
+                         f"{stat.cpu:>9.3f}{stat.max_wall:>9.3f}")
+
+        stream = io.StringIO()
+        pstats.Stats(self.profile, stream=stream).sort_stats("cumulative").print_stats(40)
+        lines += ["", "== cProfile del hilo de la interfaz (40 funciones con más tiempo acumulado) ==", stream.getvalue()]
+
+        with self._lock:
+            thread_stats, thread_runs = self.thread_stats, self.thread_runs
+        if thread_stats is not None:
+            stream = io.StringIO()
+            thread_stats.stream = stream
+            thread_stats.sort_stats("cumulative").print_stats(40)
+            lines += [f"== cProfile de los hilos de trabajo ({thread_runs} ejecuciones terminadas; "
+                      "40 funciones con más tiempo acumulado) ==", stream.getvalue()]
+
+        if tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            lines += ["== Memoria (tracemalloc) ==", f"Actual: {current / 1024:.1f} KiB · Pico: {peak / 1024:.1f} KiB", ""]
+            for stat in tracemalloc.take_snapshot().statistics("lineno")[:25]:
+                lines.append(str(stat))
+            tracemalloc.stop()
+
+        os.makedirs(REPORT_DIR, exist_ok=True)
+        path = os.path.join(REPORT_DIR, f"profile_{self.started_at:%Y%m%d_%H%M%S}.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines))
+        logger.info(f"Informe de perfilado guardado en '{path}'.")
+        return path
+
+
+def enable() -> SessionProfiler:
+    """
+    Activa el perfilado: instrumenta las peticiones HTTP, el códec JSON, los métodos
+    públicos de CanvasClient (también los generadores 'iter_*'), los manejadores de los
+    menús y los diálogos modales de Tkinter, perfila con cProfile los hilos de trabajo
+    y programa la escritura del informe al salir. Debe llamarse antes de construir las ventanas para que los
+    botones queden enlazados a los métodos instrumentados.
+    """
+    global _profiler
+    if _profiler:
+        return _profiler
+
+    import requests
+    import tkinter.filedialog
+    import tkinter.messagebox
+    from app.api import json_codec
+    from app.api.canvas_client import CanvasClient
+    from app.core import exporter
+    from app.core.jobs import JobManager
+    from app.core.outbox import Outbox
+    from app.core.prefetch import Prefetcher
+    from app.gui.activities_menu import ActivitiesMenu
+    from app.gui.course_window import CourseWindow
+    from app.gui.grades_menu import GradesMenu
+    from app.gui.main_window import MainWindow
+    from app.gui.quizzes_menu import QuizzesMenu
+    from app.gui.rubrics_menu import RubricsMenu
+
+    profiler = SessionProfiler()
+    profiler.patch(requests.Session, "request", NETWORK, "HTTP (requests.Session.request)")
+    profiler.patch(json_codec, "loads", JSON, "json_codec.loads")
+    profiler.patch(json_codec, "dumps", JSON, "json_codec.dumps")
+    # Los diálogos se miden aparte para que su espera no cuente como trabajo de los manejadores.
+    for module in (tkinter.messagebox, tkinter.filedialog):
+        short_name = module.__name__.rsplit(".", 1)[1]
+        for attribute in DIALOG_FUNCTIONS[short_name]:
+            profiler.patch(module, attribute, DIALOG, f"{short_name}.{attribute}")
+
+    for attribute, value in list(vars(CanvasClient).items()):
+        if callable(value) and not attribute.startswith("_"):
+            profiler.patch(CanvasClient, attribute, CLIENT)
+
+    for cls in (MainWindow, CourseWindow, QuizzesMenu, RubricsMenu, ActivitiesMenu, GradesMenu):
+        for attribute, value in list(vars(cls).items()):
+            if callable(value) and attribute.startswith(GUI_METHOD_PREFIXES):
+                profiler.patch(cls, attribute, TK)
+
+    # cProfile por ejecución en los hilos de trabajo: trabajos, precarga, envíos de la bandeja
+    # de salida, escritura de colecciones al exportar y peticiones paralelas del cliente.
+    profiler.patch_thread(JobManager, "_run")
+    profiler.patch_thread(Prefetcher, "_fetch")
+    profiler.patch_thread(Outbox, "flush_batch")
+    profiler.patch_thread(exporter, "_write_collection")
+    run_concurrently = CanvasClient._run_concurrently
+
+    def profiled_run_concurrently(client, func, *args, **kwargs):
+        return run_concurrently(client, profiler.profile_thread(func), *args, **kwargs)
+    CanvasClient._run_concurrently = profiled_run_concurrently
+
+    profiler.start()
+    atexit.register(profiler.write_report)
+    _profiler = profiler
+    return profiler
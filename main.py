@@ -10,10 +10,11 @@ from app.utils.logger_config import logger
 project_root = os.path.dirname(os.path.abspath(__file__))
 sys.path.append(project_root)
 
-from app.utils import config_manager
+from app.utils import config_manager, profiling
 from app.api.canvas_client import CanvasClient
+from app.core.client_registry import ClientRegistry
+from app.core.jobs import JobManager
 from app.gui.login_window import LoginWindow
-from app.gui.course_window import CourseWindow
 from app.gui.main_window import MainWindow
 
 
@@ -28,12 +29,21 @@ class App:
             logger.warning("No se proporcionaron credenciales. Saliendo.")
             return
 
-        self.client = CanvasClient(credentials['canvas_url'], credentials['api_token'])
+        self.profile = config_manager.get_active_profile() or config_manager.DEFAULT_PROFILE
+        url, token = credentials['canvas_url'], credentials['api_token']
+        # Si estas credenciales ya se validaron antes, la comprobación se hace en segundo
+        # plano con la ventana ya abierta en lugar de bloquear el arranque.
+        validation = config_manager.load_validation(url, token, self.profile)
+        self.client = CanvasClient(url, token, validate=validation is None)
         if self.client.error_message:
             messagebox.showerror("Error de Conexión", self.client.error_message)
             return
+        if validation is None:
+            config_manager.save_validation(url, token, self.client.user['id'], self.client.user['name'], self.profile)
+        else:
+            logger.info(f"Credenciales validadas previamente ({validation['user_name']}). Se comprobarán en segundo plano.")
 
-        self.run_main_flow()
+        self.run_main_flow(validate_in_background=validation is not None)
 
     def handle_login(self):
         """
@@ -44,37 +54,33 @@ class App:
         if not credentials:
             login_win = LoginWindow()
             login_win.mainloop()
-            credentials = config_manager.load_credentials()
+            credentials = login_win.credentials
         return credentials
 
-    def run_main_flow(self):
+    def run_main_flow(self, validate_in_background: bool = False):
         """
-        Ejecuta el flujo principal de la aplicación que puede ser reiniciado
-        para seleccionar un nuevo curso.
+        Obtiene la lista de cursos una sola vez y abre la ventana principal, que
+        contiene el selector de cursos y permite cambiar de curso sin reconstruirse.
+        El cliente del arranque queda registrado como la sesión del perfil activo;
+        el resto de perfiles se conectan la primera vez que se eligen.
         """
-        while True:
-            courses = self.client.get_active_courses()
-            if courses is None:
-                messagebox.showerror("Error", self.client.error_message or "No se pudo obtener la lista de cursos.")
-                break  # Salir del bucle si no se pueden obtener los cursos
-
-            course_win = CourseWindow(courses)
-            selected_course_id = course_win.get_selected_course()
-
-            if not selected_course_id:
-                logger.info("No se seleccionó ningún curso. Saliendo de la aplicación.")
-                break  # El usuario cerró la ventana de selección
-
-            main_app = MainWindow(client=self.client, course_id=selected_course_id)
-            main_app.mainloop()
+        courses = self.client.get_active_courses()
+        if courses is None:
+            # Con una validación antigua, un fallo aquí suele ser un token revocado: se comprueba para explicarlo.
+            if validate_in_background:
+                self.client.validate_token()
+            messagebox.showerror("Error", self.client.error_message or "No se pudo obtener la lista de cursos.")
+            return
 
-            # Si la ventana principal se cierra con el flag de reinicio, el bucle continuará.
-            # De lo contrario, saldrá.
-            if not main_app.restart:
-                break
+        registry = ClientRegistry(JobManager())
+        session = registry.add(self.profile, self.client, courses)
+        main_app = MainWindow(registry=registry, session=session, validate_in_background=validate_in_background)
+        main_app.mainloop()
 
         logger.info("Aplicación cerrada.")
 
-
 if __name__ == "__main__":
+    # Modo de perfilado opcional: 'python main.py --profiling' o CANVAS_AUTO_PROFILE=1
+    if profiling.is_enabled():
+        profiling.enable()
     app = App()
\ No newline at end of file